@@ -0,0 +1,174 @@
+"""
+``basis`` is module with commonly used numpy basis functions for ``CartesianGenomeFunc``. Each of them declares
+properties used by optimized evaluation paths of genome function (see ``basis_function``).
+
+
+
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import math
+import operator
+import time
+from inspect import signature
+import numpy as np
+
+
+def basis_function(scalar=None, expression=None, rules=None, cost=1.0):
+    """Decorator declaring properties of basis function
+
+    Args:
+        scalar (callable): equivalent of function for plain python floats, used by ``CartesianGenomeFunc.call_scalar``
+        expression (str): numexpr expression template with ``{0}``, ``{1}``... in place of arguments, used by
+            ``CartesianGenomeFunc.call_numexpr``
+        rules (dict): algebraic rules of function used by simplification, see
+            ``cartesian_genetics_base.simplify.EvaluationGraph``
+        cost (float): relative evaluation cost of function (cheap elementwise operation is 1), used by cost-aware
+            fitting of ``CartGenModel``
+
+    Returns:
+        callable: decorator which sets properties as attributes of function and returns the function itself
+    """
+    def decorate(func):
+        func.scalar = scalar if scalar is not None else func
+        func.expression = expression
+        func.rules = rules if rules is not None else dict()
+        func.cost = cost
+        return func
+    return decorate
+
+
+def _scalar_sqrt(x):
+    return math.sqrt(abs(x))
+
+
+def _scalar_log(x):
+    if x != x:
+        return math.nan
+    x = abs(x+0.00001)
+    return math.log(x) if x > 0 else -math.inf
+
+
+def _scalar_div(x, y):
+    y = y+0.1
+    if y == 0:
+        return math.nan if x == 0 or x != x else math.copysign(math.inf, x)
+    return x/y
+
+
+@basis_function(scalar=_scalar_sqrt, expression='sqrt(abs({0}))', cost=3.0)
+def sqrt(x):
+    return np.sqrt(np.abs(x))
+
+
+@basis_function(scalar=_scalar_log, expression='log(abs({0} + 0.00001))', cost=10.0)
+def log(x):
+    return np.log(np.abs(x+0.00001))
+
+
+@basis_function(scalar=operator.add, expression='({0} + {1})',
+                rules={'commutative': True, 'identity': 0.0})
+def summ(x, y):
+    return x+y
+
+
+@basis_function(scalar=operator.sub, expression='({0} - {1})',
+                rules={'same_args_value': 0.0})
+def diff(x, y):
+    return x-y
+
+
+@basis_function(scalar=_scalar_div, expression='({0} / ({1} + 0.1))', cost=3.0)
+def div(x, y):
+    return x/(y+0.1)
+
+
+@basis_function(scalar=operator.neg, expression='(-{0})',
+                rules={'involution': True, 'scale': -1.0})
+def neg(x):
+    return -x
+
+
+@basis_function(scalar=operator.mul, expression='({0} * {1})',
+                rules={'commutative': True, 'identity': 1.0})
+def mult(x, y):
+    return x*y
+
+
+@basis_function(scalar=lambda x: x/2, expression='({0} / 2)',
+                rules={'scale': 0.5})
+def div_2(x):
+    return x/2
+
+
+@basis_function(scalar=lambda x: x*3, expression='({0} * 3)',
+                rules={'scale': 3.0})
+def mult_3(x):
+    return x*3
+
+
+@basis_function(scalar=abs, expression='abs({0})',
+                rules={'idempotent': True})
+def abss(x):
+    return np.abs(x)
+
+
+BASIS = [sqrt, log, neg, summ, mult, div, abss, div_2, mult_3, diff]
+
+
+def get_basis_cost(func, basis_costs=None):
+    """Get relative evaluation cost of basis function
+
+    Args:
+        func (callable): basis function
+        basis_costs (dict): costs by function overriding declared ones
+
+    Returns:
+        float: cost from ``basis_costs``, ``cost`` attribute of function or 1 if it is not declared
+    """
+    if basis_costs is not None and func in basis_costs:
+        return basis_costs[func]
+    return getattr(func, 'cost', 1.0)
+
+
+def measure_basis_costs(basis_funcs, n_samples=100000, n_repeats=5, seed=0):
+    """Measure relative evaluation costs of basis functions with micro-benchmark on random arrays, the cheapest
+    function gets cost 1
+
+    Args:
+        basis_funcs (list): list of basis functions
+        n_samples (int): size of argument arrays
+        n_repeats (int): number of timed calls of each function, the fastest one is taken
+        seed (int): seed of random arguments
+
+    Returns:
+        dict: cost by function
+    """
+    args = list(np.random.RandomState(seed).normal(size=(max(len(signature(f).parameters) for f in basis_funcs),
+                                                         n_samples)))
+    timings = dict()
+    with np.errstate(all='ignore'):
+        for func in basis_funcs:
+            func_args = args[:len(signature(func).parameters)]
+            best = math.inf
+            for _ in range(n_repeats):
+                start = time.perf_counter()
+                func(*func_args)
+                best = min(best, time.perf_counter() - start)
+            timings[func] = best
+    fastest = max(min(timings.values()), 1e-12)
+    return {func: max(timing, 1e-12) / fastest for func, timing in timings.items()}
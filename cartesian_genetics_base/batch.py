@@ -0,0 +1,163 @@
+"""
+``batch`` is module with out-of-core sources of row blocks for batch prediction: ``.npy`` files are memory-mapped,
+``.csv`` files and other iterables are read block by block, so memory use doesn't depend on dataset size.
+
+
+
+
+
+
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import csv
+import queue
+import threading
+import numpy as np
+from cartesian_genetics_base.columns import is_sparse
+
+
+def _iter_array_blocks(X, block_size):
+    for start in range(0, X.shape[0], block_size):
+        block = X[start:start + block_size]
+        # memory-mapped rows are read here, not on first use of block
+        yield block if is_sparse(block) else np.array(block)
+
+
+def _iter_csv_blocks(path, block_size, header, delimiter):
+    with open(path, newline='') as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        if header:
+            next(reader, None)
+        rows = list()
+        for row in reader:
+            if not row:
+                continue
+            rows.append(row)
+            if len(rows) == block_size:
+                yield np.array(rows, dtype=float)
+                rows = list()
+        if rows:
+            yield np.array(rows, dtype=float)
+
+
+def _load_npz(path):
+    arrays = np.load(path)
+    if len(arrays.files) == 1:
+        return arrays[arrays.files[0]]
+    # several arrays are columns in order of stored names
+    return np.column_stack([arrays[name] for name in arrays.files])
+
+
+def iter_blocks(source, block_size=65536, header=False, delimiter=','):
+    """Iterate over row blocks of features source
+
+    Args:
+        source (object): path of ``.npy`` file (memory-mapped), ``.npz`` file (one 2d array, or one column per array,
+            compressed arrays can't be memory-mapped so it is loaded whole), ``.csv`` file (read ``block_size`` rows at a time), 2d numpy array or scipy sparse matrix, or iterable of
+            row blocks (like chunked pandas reader) which are converted to numpy arrays
+        block_size (int): number of rows in block
+        header (bool): skip first line of ``.csv`` file
+        delimiter (str): delimiter of ``.csv`` file
+
+    Returns:
+        generator: generator of 2d row blocks
+    """
+    if isinstance(source, str):
+        if source.endswith('.npy'):
+            return _iter_array_blocks(np.load(source, mmap_mode='r'), block_size)
+        if source.endswith('.npz'):
+            return _iter_array_blocks(_load_npz(source), block_size)
+        if source.endswith('.csv'):
+            return _iter_csv_blocks(source, block_size, header, delimiter)
+        raise ValueError('Unknown file type of {}, use .npy, .npz or .csv'.format(source))
+    if isinstance(source, np.ndarray) or is_sparse(source):
+        return _iter_array_blocks(source, block_size)
+    return (np.asarray(block) for block in source)
+
+
+def count_rows(source, header=False):
+    """Count rows of features source, iterables of blocks can't be counted without reading them
+
+    Args:
+        source (object): path of ``.npy``, ``.npz`` or ``.csv`` file, 2d numpy array or scipy sparse matrix
+        header (bool): skip first line of ``.csv`` file
+
+    Returns:
+        int: number of rows
+    """
+    if isinstance(source, str):
+        if source.endswith('.npy'):
+            return np.load(source, mmap_mode='r').shape[0]
+        if source.endswith('.npz'):
+            arrays = np.load(source)
+            return len(arrays[arrays.files[0]])
+        if source.endswith('.csv'):
+            with open(source, newline='') as f:
+                return sum(1 for row in csv.reader(f) if row) - (1 if header else 0)
+        raise ValueError('Unknown file type of {}, use .npy, .npz or .csv'.format(source))
+    if isinstance(source, np.ndarray) or is_sparse(source):
+        return source.shape[0]
+    raise ValueError('Number of rows of {} is unknown, pass array or file path'.format(type(source).__name__))
+
+
+def prefetch(iterable, n_items=1):
+    """Iterate over iterable with background thread reading up to ``n_items`` items ahead, so reading of next block
+    overlaps with processing of current one
+
+    Args:
+        iterable (iterable): iterable to read
+        n_items (int): number of items read ahead
+
+    Returns:
+        generator: generator of the same items
+    """
+    items = queue.Queue(maxsize=n_items)
+    stopped = threading.Event()
+    done = object()
+
+    def put(entry):
+        # consumer may stop iteration early, then reader stops instead of waiting for free place forever
+        while not stopped.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except Exception as e:
+            put((done, e))
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stopped.set()
@@ -21,14 +21,26 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import copy
 import math
 import random
+import time
 from inspect import signature
+from cartesian_genetics_base.basis import get_basis_cost
+from cartesian_genetics_base.genome import Genome
+from cartesian_genetics_base.rng import get_rng
 
 
 class CartesianGenomeFunc:
     """``CartesianGenomeFunc`` class is simple and naive CGP function implementation (https://en.wikipedia.org/wiki/Cartesian_genetic_programming).
-    It is still not optimized, goes front to back, propagate through all nodes to calculate result
+    Only active nodes (nodes outputs depend on) are evaluated and only inputs used by them are read, so inputs could
+    be lazy sequence which materializes input on access. Nodes are decoded from genome only when they are reached from
+    outputs, and decoded state is kept only for active nodes, so cost of setting genome and evaluation depends on
+    number of active nodes, not on size of the grid (deep grids with thousands of layers are usable)
+
+    Thread safety: ``call`` keeps all intermediate values in locals of the call, so it can be run concurrently from
+    several threads on the same object. ``set_genome`` swaps decoded genome in one assignment, so concurrent ``call``
+    sees either the old or the new genome, never a mix of them
 
     Args:
             n_inputs (int): number on inputs
@@ -37,9 +49,13 @@ class CartesianGenomeFunc:
             n_rows (int): number of functions on each layer of depth
             recurse_depth (int): depth of previous layers allowed to transmit inputs to each next level
             arity (int): arity of basis functions, if not set then would be determined automatically on given basis
-            seed (int): random seed for random operations (init_random_genome and such)
+            seed (int): seed of own random stream of genome function (used by init_random_genome), global ``random``
+                module state is not changed
             basis_funcs (list): list of callable, basis functions for genome func representations
     """
+    # maximum number of inlined operations in one numexpr expression, numexpr limits nesting and number of operands
+    _numexpr_max_ops = 31
+
     def __init__(self,
                  n_inputs=None,
                  n_outputs=None,
@@ -58,7 +74,8 @@ class CartesianGenomeFunc:
             n_rows (int): number of functions on each layer of depth
             recurse_depth (int): depth of previous layers allowed to transmit inputs to each next level
             arity (int): arity of basis functions, if not set then would be determined automatically on given basis
-            seed (int): random seed for random operations (init_random_genome and such)
+            seed (int): seed of own random stream of genome function (used by init_random_genome), global ``random``
+                module state is not changed
             basis_funcs (list): list of callable, basis functions for genome func representations
 
         Returns:
@@ -67,6 +84,7 @@ class CartesianGenomeFunc:
         """
         self._basis_funcs = basis_funcs
         self._arity = arity
+        self._set_basis_arities(basis_funcs)
         if arity is None:
             self._count_and_set_max_arity_on_basis(basis_funcs)
 
@@ -74,16 +92,41 @@ class CartesianGenomeFunc:
         self._n_outputs = n_outputs
         self._depth = depth
         self._recurse_depth = recurse_depth
-        self._layers_calls = list()
         self._n_rows = n_rows
-        self._layer_funcs = list()
+        # decoded genome: (layer functions, output codes, cache of structures derived from them), replaced as a whole
+        # on each genome change
+        self._plan = None
+        self._profiler = None
 
-        self._init_layers()
         self.seed = seed
-        if seed is not None:
-            random.seed(seed)
+        self._rng = get_rng(seed)
+
+        self._genome = Genome(([1, ] * self._n_rows * (self._arity + 1)) * self._depth + [1, ] * self._n_outputs)
+
+    def clone(self):
+        """Get copy of this genome function. Genome and decoded genome are immutable, so they are shared with the copy
+        instead of being copied, copy gets its own genome on next ``set_genome``. Copy gets its own cache of evaluation
+        plan with already built entries (they are never changed once built) and its own random stream in the same state
 
-        self._genome = ([1, ] * self._n_rows * (self._arity + 1)) * self._depth + [1, ] * self._n_outputs
+        Returns:
+            CartesianGenomeFunc: copy of this genome function
+        """
+        new_cgf = copy.copy(self)
+        new_cgf._basis_funcs = list(self._basis_funcs)
+        if self._plan is not None:
+            genome, output_codes, cache = self._plan
+            new_cgf._plan = (genome, output_codes, dict(cache))
+        new_cgf._rng = random.Random()
+        new_cgf._rng.setstate(self._rng.getstate())
+        return new_cgf
+
+    def __deepcopy__(self, memo):
+        # deep copy (used by sklearn clone of models) is cheap clone: nothing mutable is shared
+        return self.clone()
+
+    def _set_basis_arities(self, basis):
+        # arity of each basis function by its index, signatures are not inspected on decoding
+        self._basis_arities = [len(signature(func).parameters) for func in basis]
 
     def _count_and_set_max_arity_on_basis(self, basis):
         max_arity = 0
@@ -104,22 +147,15 @@ class CartesianGenomeFunc:
             None: nothing to return
         """
         self._basis_funcs = new_basis
-        self._count_and_set_max_arity_on_basis()
+        self._set_basis_arities(new_basis)
+        self._count_and_set_max_arity_on_basis(new_basis)
         self._recreate_layer_funcs()
 
-    def _init_layers(self):
-        self._layers_calls.append([False, ] * self._n_inputs)
-
-        for d in range(self._depth):
-            self._layers_calls.append([False, ] * self._n_rows)
-
-        self._layers_calls.append([False, ] * self._n_outputs)
-
     def get_genome(self):
         """Get current genome representation
 
         Returns:
-            list: list of floats with current genome
+            Genome: immutable sequence of floats with current genome
         """
         return self._genome
 
@@ -134,97 +170,441 @@ class CartesianGenomeFunc:
         """Validate and set genome using current basis
 
         Args:
-            new_genome: list of floats
+            new_genome: list of floats or ``Genome``
 
         Returns:
             None: inplace operation, returns None
         """
+        new_genome = Genome(new_genome)
         assert len(new_genome) == self._n_rows*(self._arity+1)*self._depth+self._n_outputs
-        assert all([v>=0.0 and v<=1.0 for v in new_genome])
+        assert min(new_genome)>=0.0 and max(new_genome)<=1.0
         self._genome = new_genome
 
         self._recreate_layer_funcs()
 
     def _recreate_layer_funcs(self):
-        if len(self._layer_funcs)!=0:
-            self._layer_funcs.clear()
+        self._plan = self._build_plan(self._genome)
+
+    def _build_plan(self, genome):
+        # nodes are not decoded here: only nodes reachable from outputs are decoded when active graph is built, so
+        # cost of decoding depends on number of active nodes instead of size of the grid
+        return (genome, tuple(genome[-self._n_outputs:]), dict())
+
+    def _decode_node(self, genome, address):
+        # basis function of node and addresses of values it takes
+        layer, row = address
+        func_gene = (layer-1)*self._n_rows*(self._arity+1) + row*(self._arity+1)
+        func_index = math.floor(genome[func_gene] * len(self._basis_funcs))
+        layer_func = self._basis_funcs[func_index]
+        func_arity = self._basis_arities[func_index]
+        input_addresses = tuple(self._decode_address(layer-1, code)
+                                for code in genome[func_gene+1:func_gene+1+func_arity])
+        return layer_func, input_addresses
+
+    def call(self, input_vals):
+        """Call genome function with input vals. Safe to call concurrently from several threads
+
+        Args:
+            input_vals (list): list of input arguments (arguments type depends on basis functions), or any object
+                giving them by input index (dict, lazy sequence), only inputs from ``get_used_inputs`` are taken
+
+        Returns:
+            list: output values from output layer
+        """
+        plan = self._get_plan()
+        if self._profiler is not None:
+            return self._call_profiled(plan, input_vals, self._profiler)
+        _, output_addresses = self._get_from_plan_cache(plan, 'active_graph', self._build_active_graph)
+        # only active nodes are evaluated and only inputs they use are taken from input_vals, values are released as
+        # soon as their last consumer is evaluated
+        values = {address: input_vals[address[1]] for address in self._get_used_input_addresses(plan)}
+        for address, layer_func, input_addresses, dead_addresses in self._get_from_plan_cache(
+                plan, 'evaluation_steps', self._build_evaluation_steps):
+            values[address] = layer_func(*[values[a] for a in input_addresses])
+            for dead_address in dead_addresses:
+                del values[dead_address]
+        return [values[address] for address in output_addresses]
+
+    def _call_profiled(self, plan, input_vals, profiler):
+        start = time.perf_counter()
+        _, output_addresses = self._get_from_plan_cache(plan, 'active_graph', self._build_active_graph)
+        values = {address: input_vals[address[1]] for address in self._get_used_input_addresses(plan)}
+        evaluated = list()
+        for address, layer_func, input_addresses, dead_addresses in self._get_from_plan_cache(
+                plan, 'evaluation_steps', self._build_evaluation_steps):
+            node_start = time.perf_counter()
+            values[address] = layer_func(*[values[a] for a in input_addresses])
+            # only size of result is kept, so values are still released after their last consumer
+            evaluated.append((address, layer_func, time.perf_counter() - node_start,
+                              getattr(values[address], 'nbytes', 0)))
+            for dead_address in dead_addresses:
+                del values[dead_address]
+        outputs = [values[address] for address in output_addresses]
+        profiler.record_call(evaluated, time.perf_counter() - start)
+        return outputs
+
+    def set_profiler(self, profiler):
+        """Set profiler collecting statistics of nodes evaluated by ``call``, profiling is disabled if None. Clones of
+        genome function share its profiler
 
-        for l in range(self._depth):
-            offset = l*(self._n_rows*(self._arity+1))
+        Args:
+            profiler (EvaluationProfiler): profiler, see ``cartesian_genetics_base.profiler``
 
-            self._layer_funcs.append(list())
+        Returns:
+            None: nothing to return
+        """
+        self._profiler = profiler
 
-            for row_num in range(self._n_rows):
-                func_index_from = row_num * (self._arity + 1)
-                func_index_to = (row_num+1) * (self._arity + 1)
+    def get_profiler(self):
+        """Get profiler set by ``set_profiler``
 
-                func_code,*inputs_codes = self._genome[offset+func_index_from: offset+func_index_to]
-                decoded_function = self._get_function_from_basis(func_code)
+        Returns:
+            EvaluationProfiler: profiler or None if profiling is disabled
+        """
+        return self._profiler
+
+    def _get_plan(self):
+        plan = self._plan
+        if plan is None:
+            raise RuntimeError('Genome is not set, use set_genome or init_random_genome first')
+        return plan
+
+    def _get_from_plan_cache(self, plan, key, build):
+        cache = plan[2]
+        if key not in cache:
+            cache[key] = build(plan)
+        return cache[key]
+
+    def _decode_address(self, layer_num, code):
+        # address of value taken by encoded input: (index of layer, index in that layer), 0 layer is inputs. Encoded
+        # index counts rows of layers from layer_num down to layer_num-recurse_depth+1, inputs are the last
+        lowest_layer = layer_num - self._recurse_depth + 1
+        n_node_values = (layer_num - max(lowest_layer, 1) + 1) * self._n_rows
+        n_values = n_node_values + (self._n_inputs if lowest_layer <= 0 else 0)
+        index = math.floor(code*n_values)
+        if index < n_node_values:
+            return layer_num - index // self._n_rows, index % self._n_rows
+        if index < n_values:
+            return 0, index - n_node_values
+        raise IndexError('Encoded input {} is out of range'.format(code))
+
+    def _build_active_graph(self, plan):
+        genome, output_codes, _ = plan
+        output_addresses = [self._decode_address(self._depth, code) for code in output_codes]
+
+        active_nodes = dict()
+        to_visit = [address for address in output_addresses if address[0] > 0]
+        while to_visit:
+            address = to_visit.pop()
+            if address in active_nodes:
+                continue
+            active_nodes[address] = self._decode_node(genome, address)
+            to_visit.extend(a for a in active_nodes[address][1] if a[0] > 0 and a not in active_nodes)
+
+        return [(address, ) + active_nodes[address] for address in sorted(active_nodes)], output_addresses
+
+    def _get_active_graph(self, genome=None):
+        # active nodes sorted by address as (address, function, input addresses) and output addresses
+        plan = self._get_plan() if genome is None else self._build_plan(Genome(genome))
+        return self._get_from_plan_cache(plan, 'active_graph', self._build_active_graph)
+
+    def _build_evaluation_steps(self, plan):
+        # active nodes as (address, function, input addresses, addresses of values not needed after this node)
+        nodes, output_addresses = self._get_from_plan_cache(plan, 'active_graph', self._build_active_graph)
+        last_use = dict()
+        for step, (_, _, input_addresses) in enumerate(nodes):
+            for a in input_addresses:
+                last_use[a] = step
+        dead_after = [list() for _ in nodes]
+        outputs = set(output_addresses)
+        for address, step in last_use.items():
+            if address not in outputs:
+                dead_after[step].append(address)
+        return [node + (tuple(dead), ) for node, dead in zip(nodes, dead_after)]
+
+    def get_max_live_values(self):
+        """Get peak number of values (inputs and node outputs) kept alive at once by ``call``, values are released
+        after their last consumer is evaluated
 
-                # appending func to last layer
-                self._layer_funcs[-1].append((decoded_function,inputs_codes))
+        Returns:
+            int: number of values
+        """
+        plan = self._get_plan()
+        live = len(self._get_used_input_addresses(plan))
+        max_live = live
+        for _, _, _, dead_addresses in self._get_from_plan_cache(plan, 'evaluation_steps', self._build_evaluation_steps):
+            max_live = max(max_live, live + 1)
+            live += 1 - len(dead_addresses)
+        return max_live
+
+    def _get_used_input_addresses(self, plan):
+        def build(plan):
+            nodes, output_addresses = self._get_from_plan_cache(plan, 'active_graph', self._build_active_graph)
+            return sorted({a for _, _, input_addresses in nodes for a in input_addresses if a[0] == 0} |
+                          {a for a in output_addresses if a[0] == 0})
+        return self._get_from_plan_cache(plan, 'used_input_addresses', build)
+
+    def get_used_inputs(self):
+        """Get indices of inputs used by active nodes and outputs of current genome, ``call`` reads only these inputs
 
-    def _get_function_from_basis(self,func_num):
-        func_index = math.floor(func_num * len(self._basis_funcs))
-        return self._basis_funcs[func_index]
+        Returns:
+            list: sorted input indices
+        """
+        return [address[1] for address in self._get_used_input_addresses(self._get_plan())]
 
-    def call(self, input_vals):
-        """Call genome function with input vals
+    def get_active_genes(self, genome=None):
+        """Get indices of active genes: genes of nodes which outputs depend on (function gene and genes of inputs
+        used by function arity) and output genes. Changing only inactive genes doesn't change genome function
 
         Args:
-            input_vals (list): list of input arguments (arguments type depends on basis functions)
+            genome (list): genome to analyze, current genome if not set
 
         Returns:
-            list: output values from output layer
+            list: sorted indices of active genes
+        """
+        nodes, _ = self._get_active_graph(genome)
+        active_genes = list()
+        for (layer, row), _, input_addresses in nodes:
+            func_gene = (layer-1)*self._n_rows*(self._arity+1) + row*(self._arity+1)
+            active_genes.extend(range(func_gene, func_gene+len(input_addresses)+1))
+        n_genes = self._n_rows*(self._arity+1)*self._depth+self._n_outputs
+        active_genes.extend(range(n_genes-self._n_outputs, n_genes))
+        return active_genes
+
+    def decode_gene(self, index, value):
+        """Decode value of gene: function gene is decoded into basis function index, input and output genes are
+        decoded into address of value they take (index of layer, index in layer), 0 layer is inputs
+
+        Args:
+            index (int): gene index
+            value (float): gene value
+
+        Returns:
+            int or tuple: decoded gene
+        """
+        genes_in_layer = self._n_rows*(self._arity+1)
+        if index >= genes_in_layer*self._depth:
+            return self._decode_address(self._depth, value)
+        if index % (self._arity+1) == 0:
+            return math.floor(value*len(self._basis_funcs))
+        return self._decode_address(index // genes_in_layer, value)
+
+    def get_cost(self, basis_costs=None, genome=None):
+        """Get evaluation cost of genome: sum of costs of basis functions of active nodes (see
+        ``cartesian_genetics_base.basis.get_basis_cost``), number of active nodes if costs are not declared
+
+        Args:
+            basis_costs (dict): costs by basis function overriding declared ones
+            genome (list): genome to analyze, current genome if not set
+
+        Returns:
+            float: cost of genome
         """
-        self._make_top_down_propagation(input_vals)
-        return list(self._layers_calls[-1])
+        nodes, _ = self._get_active_graph(genome)
+        return sum(get_basis_cost(layer_func, basis_costs) for _, layer_func, _ in nodes)
 
-    def _make_top_down_propagation(self,inputs):
-        for i,v in enumerate(inputs):
-            self._layers_calls[0][i] = v
+    def get_phenotype_key(self, genome=None):
+        """Get key of phenotype: genomes with equal keys have the same active nodes with the same functions and
+        connections, so they compute the same function
 
-        for l in range(self._depth):
-            self._propagate_calls(to_layer=l)
+        Args:
+            genome (list): genome to analyze, current genome if not set
+
+        Returns:
+            tuple: hashable phenotype key
+        """
+        nodes, output_addresses = self._get_active_graph(genome)
+        return tuple(nodes), tuple(output_addresses)
 
-        self._propagate_outputs()
+    def _build_scalar_func(self, plan):
+        nodes, output_addresses = self._build_active_graph(plan)
 
-        return self._layers_calls[-1]
+        def name(address):
+            return 'x{}'.format(address[1]) if address[0] == 0 else 'n{}_{}'.format(*address)
 
-    def _propagate_outputs(self):
-        last_inputs = self._get_inputs_for_layer(self._depth)
-        encoded_outs = self.get_genome()[-self._n_outputs:]
+        namespace = dict()
+        used_inputs = self._get_used_input_addresses(plan)
+        lines = ['def scalar_call(inputs):']
+        lines.extend('    {} = inputs[{}]'.format(name(a), a[1]) for a in used_inputs)
+        for address, layer_func, input_addresses in nodes:
+            func_name = 'f{}_{}'.format(*address)
+            namespace[func_name] = getattr(layer_func, 'scalar', layer_func)
+            lines.append('    {} = {}({})'.format(name(address), func_name, ', '.join(map(name, input_addresses))))
+        lines.append('    return ({}, )'.format(', '.join(map(name, output_addresses))))
+
+        exec(compile('\n'.join(lines), '<cartesian genome scalar call>', 'exec'), namespace)
+        return namespace['scalar_call']
+
+    def compile_scalar(self):
+        """Compile current genome into plain python function over active nodes only. Basis function with ``scalar``
+        attribute (see ``cartesian_genetics_base.basis``) is replaced by it, so numpy functions could be replaced with
+        ``math`` equivalents for float inputs
+
+        Returns:
+            callable: function taking tuple of input values and returning tuple of output values
+        """
+        return self._get_from_plan_cache(self._get_plan(), 'scalar_func', self._build_scalar_func)
 
-        out_value = self._decode_and_get_inputs(last_inputs,encoded_outs)
-        for i,v in enumerate(out_value):
-            self._layers_calls[-1][i] = v
+    def call_scalar(self, input_vals):
+        """Call genome function on single sample given as plain values (for example tuple of floats). Much faster than
+        ``call`` for single sample: only active nodes are evaluated by compiled function, without numpy
 
-    def _propagate_calls(self,to_layer=None):
-        layer_functions_with_encoded_inputs = self._layer_funcs[to_layer]
-        layer_total_inputs = self._get_inputs_for_layer(to_layer)
+        Args:
+            input_vals (tuple): tuple of input values
 
-        for i,(layer_func,encoded_inputs) in enumerate(layer_functions_with_encoded_inputs):
-            func_input = self._decode_and_get_inputs(layer_total_inputs,encoded_inputs)
-            func_arity = len(signature(layer_func).parameters)
-            func_result = layer_func(*(func_input[:func_arity]))
-            self._layers_calls[to_layer+1][i] = func_result
+        Returns:
+            tuple: output values
+        """
+        return self.compile_scalar()(input_vals)
+
+    def _build_numexpr_program(self, plan):
+        nodes, output_addresses = self._build_active_graph(plan)
+
+        consumers_count = dict()
+        for address in [a for _, _, input_addresses in nodes for a in input_addresses] + output_addresses:
+            consumers_count[address] = consumers_count.get(address, 0) + 1
+
+        def name(address):
+            return 'x{}'.format(address[1]) if address[0] == 0 else 'n{}_{}'.format(*address)
+
+        # steps are (variable name, expression string) or (variable name, (function, argument names)),
+        # single consumer nodes with expression template are inlined into expression of their consumer
+        steps = list()
+        inlined = dict()
+
+        def materialize(address):
+            if address in inlined:
+                steps.append((name(address), inlined.pop(address)[0]))
+            return name(address)
+
+        for address, layer_func, input_addresses in nodes:
+            template = getattr(layer_func, 'expression', None)
+            if template is None:
+                steps.append((name(address), (layer_func, [materialize(a) for a in input_addresses])))
+                continue
+
+            n_ops = 1 + sum(inlined[a][1] for a in set(input_addresses) if a in inlined)
+            if n_ops > self._numexpr_max_ops:
+                input_names = [materialize(a) for a in input_addresses]
+                n_ops = 1
+            else:
+                input_names = [inlined[a][0] if a in inlined else name(a) for a in input_addresses]
+                for a in set(input_addresses):
+                    inlined.pop(a, None)
+
+            expression = template.format(*input_names)
+            if consumers_count[address] > 1:
+                steps.append((name(address), expression))
+            else:
+                inlined[address] = (expression, n_ops)
+
+        outputs = [inlined[a][0] if a in inlined else name(a) for a in output_addresses]
+        used_inputs = [address[1] for address in self._get_used_input_addresses(plan)]
+        return used_inputs, steps, outputs
+
+    def get_numexpr_program(self):
+        """Translate active graph of current genome into expressions for numexpr. Nodes with ``expression`` template
+        (see ``cartesian_genetics_base.basis``) used only once are inlined into expression of their consumer, nodes
+        used several times or without template are computed once into variable
 
-    def _decode_and_get_inputs(self,total_inputs,encoded_inputs):
-        return tuple(total_inputs[math.floor(i*len(total_inputs))] for i in encoded_inputs)
+        Returns:
+            tuple: (indices of used inputs, list of steps, list of output expressions), each step is (variable name,
+            expression string) or (variable name, (basis function, argument names)). Input ``i`` is named ``xi``
+        """
+        return self._get_from_plan_cache(self._get_plan(), 'numexpr_program', self._build_numexpr_program)
+
+    def _build_levels(self, plan):
+        # active nodes grouped by dependency level (nodes of one level depend only on previous levels) with addresses
+        # of values not needed after level: list of (level nodes, dead addresses)
+        nodes, output_addresses = self._get_from_plan_cache(plan, 'active_graph', self._build_active_graph)
+        node_levels = dict()
+        levels = list()
+        for node in nodes:
+            address, _, input_addresses = node
+            level = 1 + max((node_levels.get(a, 0) for a in input_addresses), default=0)
+            node_levels[address] = level
+            if len(levels) < level:
+                levels.append(list())
+            levels[level-1].append(node)
+
+        last_use = dict()
+        for level, level_nodes in enumerate(levels):
+            for _, _, input_addresses in level_nodes:
+                for a in input_addresses:
+                    last_use[a] = level
+        dead_after = [list() for _ in levels]
+        outputs = set(output_addresses)
+        for address, level in last_use.items():
+            if address not in outputs:
+                dead_after[level].append(address)
+        return [(tuple(level_nodes), tuple(dead)) for level_nodes, dead in zip(levels, dead_after)]
+
+    def call_threaded(self, input_vals, executor):
+        """Call genome function with input vals evaluating independent active nodes of each dependency level in
+        thread pool, next level starts when the whole level is computed. Speeds up wide graphs on large arrays, for
+        which numpy releases GIL
 
-    def _get_inputs_for_layer(self, layer_num):
-        inputs = list()
+        Args:
+            input_vals (list): list of input arguments, like in ``call``
+            executor (concurrent.futures.Executor): thread pool to run nodes in
 
-        for depth in range(0, self._recurse_depth):
-            if layer_num-depth>=0:
-                inputs.extend(self._layers_calls[layer_num-depth])
+        Returns:
+            list: output values from output layer
+        """
+        plan = self._get_plan()
+        _, output_addresses = self._get_from_plan_cache(plan, 'active_graph', self._build_active_graph)
+        values = {address: input_vals[address[1]] for address in self._get_used_input_addresses(plan)}
+
+        def evaluate(node):
+            _, layer_func, input_addresses = node
+            return layer_func(*[values[a] for a in input_addresses])
+
+        for level_nodes, dead_addresses in self._get_from_plan_cache(plan, 'levels', self._build_levels):
+            if len(level_nodes) == 1:
+                results = [evaluate(level_nodes[0])]
+            else:
+                results = list(executor.map(evaluate, level_nodes))
+            for (address, _, _), result in zip(level_nodes, results):
+                values[address] = result
+            for dead_address in dead_addresses:
+                del values[dead_address]
+        return [values[address] for address in output_addresses]
+
+    def call_numexpr(self, input_vals):
+        """Call genome function with input vals evaluating whole active graph with multi-threaded numexpr engine, node
+        by node evaluation is used only for basis functions without ``expression`` template. Requires numexpr package
 
-        return inputs
+        Args:
+            input_vals (list): list of input numpy arrays
 
-    def init_random_genome(self):
+        Returns:
+            list: output values from output layer
+        """
+        try:
+            import numexpr
+        except ImportError:
+            raise ImportError('numexpr backend requires numexpr package, install it with: pip install numexpr')
+
+        used_inputs, steps, outputs = self.get_numexpr_program()
+        variables = {'x{}'.format(i): input_vals[i] for i in used_inputs}
+        for variable_name, step in steps:
+            if isinstance(step, str):
+                variables[variable_name] = numexpr.evaluate(step, local_dict=variables)
+            else:
+                layer_func, argument_names = step
+                variables[variable_name] = layer_func(*[variables[n] for n in argument_names])
+
+        return [variables[output] if output in variables else numexpr.evaluate(output, local_dict=variables)
+                for output in outputs]
+
+    def init_random_genome(self, rng=None):
         """Inits random genome with uniform distribution
 
+        Args:
+            rng (random.Random): random stream to draw genes from, own stream of genome function if not set
+
         Returns:
             None: inits random genome inplace, doesn't return anything
         """
-        self.set_genome([random.random() for _ in self._genome])
+        rng = self._rng if rng is None else rng
+        self.set_genome([rng.random() for _ in self._genome])
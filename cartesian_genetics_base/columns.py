@@ -0,0 +1,169 @@
+"""
+``columns`` is module with column access for genome function inputs: genome function reads its inputs as columns of
+features matrix, column sources here give them lazily, so columns not used by genome are never materialized.
+
+
+
+
+
+
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from collections.abc import Mapping, Sequence
+import numpy as np
+
+
+def is_sparse(X):
+    """Check if X is scipy sparse matrix, scipy is imported only if it is installed
+
+    Args:
+        X (object): features matrix
+
+    Returns:
+        bool: True if X is scipy sparse matrix
+    """
+    try:
+        from scipy import sparse
+    except ImportError:
+        return False
+    return sparse.issparse(X)
+
+
+class SparseColumns(Sequence):
+    """``SparseColumns`` is lazy sequence of dense columns of scipy sparse matrix. Matrix is converted to CSC form once,
+    each column is densified on first access and cached, so only columns used by genome function take dense memory
+
+    Args:
+            X (scipy.sparse.spmatrix): sparse features matrix
+    """
+    def __init__(self, X):
+        X = X.tocsc()
+        if not X.has_canonical_format:
+            X = X.copy()
+            X.sum_duplicates()
+        self._X = X
+        self.shape = X.shape
+        self._columns = dict()
+
+    def __len__(self):
+        return self.shape[1]
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.shape[1]:
+            raise IndexError('Column {} is out of range for {} columns'.format(index, self.shape[1]))
+        column = self._columns.get(index)
+        if column is None:
+            start, end = self._X.indptr[index], self._X.indptr[index+1]
+            column = np.zeros(self.shape[0], dtype=self._X.dtype)
+            column[self._X.indices[start:end]] = self._X.data[start:end]
+            self._columns[index] = column
+        return column
+
+    @property
+    def n_densified(self):
+        """Number of columns densified so far"""
+        return len(self._columns)
+
+
+class NpyColumns(Sequence):
+    """``NpyColumns`` is lazy sequence of columns stored in separate ``.npy`` files, file is memory-mapped on first
+    access of its column, so files of columns not used by genome function are never opened
+
+    Args:
+            paths (list): paths of ``.npy`` files, one for each column
+    """
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self._columns = dict()
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self.paths):
+            raise IndexError('Column {} is out of range for {} columns'.format(index, len(self.paths)))
+        column = self._columns.get(index)
+        if column is None:
+            column = np.load(self.paths[index], mmap_mode='r')
+            self._columns[index] = column
+        return column
+
+
+class RowsColumns(Sequence):
+    """``RowsColumns`` is lazy sequence of columns of another columns source restricted to given rows, column is
+    taken from source and restricted on first access and cached, so columns not used by genome function are not read
+
+    Args:
+            columns (Sequence or Mapping): columns by input index, like returned by ``get_columns``
+            rows (numpy.array): indices of rows to keep
+    """
+    def __init__(self, columns, rows):
+        self._source = columns
+        self.rows = rows
+        self.shape = (len(rows), len(columns))
+        self._columns = dict()
+
+    def __len__(self):
+        return len(self._source)
+
+    def __getitem__(self, index):
+        column = self._columns.get(index)
+        if column is None:
+            column = np.asarray(self._source[index])[self.rows]
+            self._columns[index] = column
+        return column
+
+
+def get_columns(X):
+    """Get columns of features as genome function inputs. Columns are taken lazily where source allows it, so only
+    columns used by genome function are read
+
+    Args:
+        X (object): 2d numpy array, structured numpy array (fields in order of inputs), scipy sparse matrix, dict of
+            columns by input index or sequence of columns (like ``NpyColumns``), the last two are returned as is
+
+    Returns:
+        Sequence or Mapping: columns of X by input index
+    """
+    if isinstance(X, (Sequence, Mapping)):
+        return X
+    if is_sparse(X):
+        return SparseColumns(X)
+    if X.dtype.names is not None:
+        return [X[name] for name in X.dtype.names]
+    return [X[:, i] for i in range(X.shape[1])]
+
+
+def get_n_rows(X, used_inputs=None):
+    """Get number of samples in features source accepted by ``get_columns``. Number is taken from ``shape`` of
+    source if it has one, otherwise from length of the first used column, so lazy sources don't read other columns
+
+    Args:
+        X (object): features source
+        used_inputs (list): indices of columns which are read anyway, the first column if not set
+
+    Returns:
+        int: number of samples
+    """
+    if hasattr(X, 'shape'):
+        return X.shape[0]
+    if used_inputs:
+        return len(X[used_inputs[0]])
+    if isinstance(X, Mapping):
+        return len(next(iter(X.values())))
+    return len(X[0])
@@ -0,0 +1,78 @@
+"""
+``ensemble`` is module with ``EnsembleGenomeFunc``: several fitted ``CartesianGenomeFunc`` merged into one
+``EvaluationGraph``, so subexpressions shared by ensemble members are computed once.
+
+
+
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+from cartesian_genetics_base.simplify import EvaluationGraph
+
+
+class EnsembleGenomeFunc:
+    """``EnsembleGenomeFunc`` merges active graphs of several genome functions into one DAG with common
+    subexpressions deduplicated (identical nodes only, basis rules are not applied as they are not exact in floating
+    point, see ``cartesian_genetics_base.simplify``), evaluates it once and returns outputs of every member exactly
+    as they compute them
+
+    Args:
+            cgfs (list): list of ``CartesianGenomeFunc`` with genomes set
+            input_indices (list): for each member, list with index of ensemble input for each input of member (for
+                members fitted on subsets of features), members share the same inputs if not set
+            n_inputs (int): number of ensemble inputs, number of inputs of the first member if not set
+    """
+    def __init__(self, cgfs, input_indices=None, n_inputs=None):
+        if n_inputs is None:
+            n_inputs = cgfs[0]._n_inputs
+        if input_indices is None:
+            input_indices = [None] * len(cgfs)
+
+        self.graph = EvaluationGraph(n_inputs, apply_rules=False)
+        self.member_outputs = [self.graph.add_genome_func(cgf, indices) for cgf, indices in zip(cgfs, input_indices)]
+        self.graph.outputs = sorted({node_id for outputs in self.member_outputs for node_id in outputs})
+        self.n_member_ops = sum(len(cgf._get_active_graph()[0]) for cgf in cgfs)
+
+    @property
+    def n_ops(self):
+        """Number of basis function calls needed to compute outputs of all members"""
+        return self.graph.n_ops
+
+    def call(self, input_vals):
+        """Call all members with input vals
+
+        Args:
+            input_vals (list): list of ensemble input values
+
+        Returns:
+            list: for each member, list of its output values
+        """
+        values = dict(zip(self.graph.outputs, self.graph.call(input_vals)))
+        return [[values[node_id] for node_id in outputs] for outputs in self.member_outputs]
+
+    def call_mean(self, input_vals):
+        """Call all members with input vals and average their outputs
+
+        Args:
+            input_vals (list): list of ensemble input values
+
+        Returns:
+            list: mean of members output values for each output
+        """
+        members = self.call(input_vals)
+        return [np.mean(outputs, axis=0) for outputs in zip(*members)]
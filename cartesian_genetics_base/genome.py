@@ -0,0 +1,107 @@
+"""
+``genome`` is module with ``Genome``: lightweight immutable genome representation shared between genome functions,
+models and their copies without copying.
+
+
+
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from collections.abc import Sequence
+
+
+class Genome(Sequence):
+    """``Genome`` is immutable sequence of float genes. Being immutable it is safely shared: ``clone`` and copying of
+    objects holding it never copy genes, changed genome is created with ``mutate``. Equal to and hashed as tuple of
+    its genes
+
+    Args:
+            genes (list): list of floats
+    """
+    __slots__ = ('_genes', '_hash')
+
+    def __init__(self, genes):
+        self._genes = genes._genes if isinstance(genes, Genome) else tuple(genes)
+        # hash of genes is computed once, genome is hashed on every check of already scored genomes
+        self._hash = None
+
+    def __len__(self):
+        return len(self._genes)
+
+    def __getitem__(self, index):
+        return self._genes[index]
+
+    def __iter__(self):
+        return iter(self._genes)
+
+    def __eq__(self, other):
+        if isinstance(other, Genome):
+            return self._genes == other._genes
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return self._genes == tuple(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(self._genes)
+        return self._hash
+
+    def __repr__(self):
+        return 'Genome({!r})'.format(list(self._genes))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return Genome, (self._genes, )
+
+    def clone(self):
+        """Get copy of genome, genes storage is shared
+
+        Returns:
+            Genome: genome equal to this one
+        """
+        return self
+
+    def mutate(self, changes):
+        """Get new genome with some genes changed
+
+        Args:
+            changes (dict): new values of genes by gene index
+
+        Returns:
+            Genome: new genome
+        """
+        genes = list(self._genes)
+        for index, value in changes.items():
+            genes[index] = value
+        return Genome(genes)
+
+    def to_list(self):
+        """Get genes as list
+
+        Returns:
+            list: list of floats
+        """
+        return list(self._genes)
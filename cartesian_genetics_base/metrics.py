@@ -0,0 +1,126 @@
+"""
+``metrics`` is module with vectorised metrics which ``CartGenModel`` can run as plain numpy reductions, without sklearn
+input validation on each scored candidate. Each metric also scores a whole batch of candidate predictions at once.
+
+
+
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+
+
+class FastMetric:
+    """``FastMetric`` is metric with sklearn signature ``metric(y_true, y_pred)`` computed as numpy reduction over last
+    axis, so ``batch`` scores many candidate predictions stacked in rows with one call
+
+    Args:
+            name (str): metric name, same as name of sklearn equivalent
+            reduction (callable): function ``(y_true, y_preds) -> scores`` reducing over the last axis of ``y_preds``
+    """
+    def __init__(self, name, reduction):
+        self.__name__ = name
+        self._reduction = reduction
+
+    def __repr__(self):
+        return 'FastMetric({})'.format(self.__name__)
+
+    def __call__(self, y_true, y_pred):
+        """Score one prediction
+
+        Args:
+            y_true (numpy.array): 1d array with target
+            y_pred (numpy.array): 1d array with predictions
+
+        Returns:
+            float: metric value
+        """
+        return float(self._reduction(np.asarray(y_true), np.asarray(y_pred)))
+
+    def batch(self, y_true, y_preds):
+        """Score batch of predictions against the same target
+
+        Args:
+            y_true (numpy.array): 1d array with target of shape (n_samples,)
+            y_preds (numpy.array): 2d array of shape (n_candidates, n_samples), one candidate prediction in each row
+
+        Returns:
+            numpy.array: 1d array with metric value for each candidate
+        """
+        return self._reduction(np.asarray(y_true), np.asarray(y_preds))
+
+
+def _mean_absolute_error(y_true, y_preds):
+    return np.mean(np.abs(y_preds - y_true), axis=-1)
+
+
+def _mean_squared_error(y_true, y_preds):
+    return np.mean(np.square(y_preds - y_true), axis=-1)
+
+
+def _log_loss(y_true, y_preds):
+    labels_low, labels_high = y_true.min(), y_true.max()
+    if labels_low == labels_high or not np.all((y_true == labels_low) | (y_true == labels_high)):
+        raise ValueError('Fast log_loss supports only binary targets')
+    positive = y_true == labels_high
+    eps = np.finfo(y_preds.dtype).eps if np.issubdtype(y_preds.dtype, np.floating) else np.finfo(float).eps
+    proba = np.clip(y_preds, eps, 1 - eps)
+    return -np.mean(np.where(positive, np.log(proba), np.log1p(-proba)), axis=-1)
+
+
+def _accuracy_score(y_true, y_preds):
+    return np.mean(y_preds == y_true, axis=-1)
+
+
+def _r2_score(y_true, y_preds):
+    ss_res = np.sum(np.square(y_true - y_preds), axis=-1)
+    ss_tot = np.sum(np.square(y_true - y_true.mean()))
+    if ss_tot == 0:
+        # constant target, same convention as sklearn: perfect prediction is 1.0, anything else is 0.0
+        return np.where(ss_res == 0, 1.0, 0.0)
+    return 1 - ss_res / ss_tot
+
+
+mean_absolute_error = FastMetric('mean_absolute_error', _mean_absolute_error)
+mean_squared_error = FastMetric('mean_squared_error', _mean_squared_error)
+log_loss = FastMetric('log_loss', _log_loss)
+accuracy_score = FastMetric('accuracy_score', _accuracy_score)
+r2_score = FastMetric('r2_score', _r2_score)
+
+FAST_METRICS = {metric.__name__: metric for metric in [mean_absolute_error,
+                                                        mean_squared_error,
+                                                        log_loss,
+                                                        accuracy_score,
+                                                        r2_score]}
+
+
+def get_fast_metric(metric):
+    """Get fast equivalent of metric: ``FastMetric`` is returned as is, sklearn metric with known fast equivalent is
+    mapped to it
+
+    Args:
+        metric (callable): metric function
+
+    Returns:
+        FastMetric: fast metric or None if there is no fast equivalent
+    """
+    if isinstance(metric, FastMetric):
+        return metric
+    module = getattr(metric, '__module__', None) or ''
+    if module.startswith('sklearn.metrics'):
+        return FAST_METRICS.get(getattr(metric, '__name__', None))
+    return None
@@ -0,0 +1,179 @@
+"""
+``mutation`` is module with mutation schedules used by ``CartGenModel`` evolution process: they decide how many genome
+points are mutated in each offspring and adapt it to observed success of mutations.
+
+
+
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import math
+
+
+class FixedMutation:
+    """``FixedMutation`` mutates the same number of points in every offspring during whole evolution"""
+    def start(self, mutation_points):
+        """Reset schedule before evolution
+
+        Args:
+            mutation_points (int): initial number of points to mutate
+
+        Returns:
+            None: nothing to return
+        """
+        self.mutation_points = mutation_points
+
+    def sample(self, parent, rng):
+        """Get number of points to mutate in next offspring of parent
+
+        Args:
+            parent (Genome): parent genome
+            rng (random.Random): random numbers source
+
+        Returns:
+            float: number of points to mutate, rounded by caller
+        """
+        return self.mutation_points
+
+    def offspring(self, parent, child, points):
+        """Register offspring created with ``points`` returned by ``sample``
+
+        Args:
+            parent (Genome): parent genome
+            child (Genome): offspring genome
+            points (float): value returned by ``sample`` for this offspring
+
+        Returns:
+            None: nothing to return
+        """
+
+    def update(self, n_offspring, n_successes, elites):
+        """Adapt schedule after generation
+
+        Args:
+            n_offspring (int): number of scored offspring in generation
+            n_successes (int): number of offspring better than their parents
+            elites (list): genomes of elites after generation
+
+        Returns:
+            None: nothing to return
+        """
+
+    def current_points(self):
+        """Get current (mean) number of points to mutate, for reporting
+
+        Returns:
+            float: number of points
+        """
+        return float(self.mutation_points)
+
+
+class OneFifthRuleMutation(FixedMutation):
+    """``OneFifthRuleMutation`` adapts number of mutated points with Rechenberg 1/5th success rule: if more than
+    ``target_success_rate`` of offspring in generation are better than their parents, mutation is too cautious and
+    number of points is multiplied by ``factor``, otherwise it is divided by ``factor``
+
+    Args:
+            factor (float): multiplier of number of points
+            target_success_rate (float): success rate which keeps number of points unchanged
+            min_points (float): minimal number of points
+            max_points (float): maximal number of points, not limited if not set
+    """
+    def __init__(self, factor=1.5, target_success_rate=0.2, min_points=1.0, max_points=None):
+        self.factor = factor
+        self.target_success_rate = target_success_rate
+        self.min_points = min_points
+        self.max_points = max_points
+
+    def update(self, n_offspring, n_successes, elites):
+        if n_offspring == 0:
+            return
+        if n_successes / n_offspring > self.target_success_rate:
+            self.mutation_points *= self.factor
+        else:
+            self.mutation_points /= self.factor
+        self.mutation_points = max(self.min_points, self.mutation_points)
+        if self.max_points is not None:
+            self.mutation_points = min(self.max_points, self.mutation_points)
+
+
+class SelfAdaptiveMutation(FixedMutation):
+    """``SelfAdaptiveMutation`` stores number of points to mutate with each elite genome. Offspring inherits it
+    from parent multiplied by log-normal noise ``exp(tau*N(0, 1))``, so rates of successful offspring survive with them
+
+    Args:
+            tau (float): learning rate of log-normal noise
+            min_points (float): minimal number of points
+            max_points (float): maximal number of points, not limited if not set
+    """
+    def __init__(self, tau=0.3, min_points=1.0, max_points=None):
+        self.tau = tau
+        self.min_points = min_points
+        self.max_points = max_points
+
+    def start(self, mutation_points):
+        self.mutation_points = mutation_points
+        self._rates = dict()
+        self._pending_rates = dict()
+
+    def sample(self, parent, rng):
+        rate = self._rates.get(parent, self.mutation_points) * math.exp(self.tau * rng.gauss(0.0, 1.0))
+        rate = max(self.min_points, rate)
+        if self.max_points is not None:
+            rate = min(self.max_points, rate)
+        return rate
+
+    def offspring(self, parent, child, points):
+        self._pending_rates[child] = points
+
+    def update(self, n_offspring, n_successes, elites):
+        # only rates of current elites are kept, they are parents of next generation
+        known_rates = self._rates
+        known_rates.update(self._pending_rates)
+        self._rates = {genome: known_rates[genome] for genome in elites if genome in known_rates}
+        self._pending_rates = dict()
+
+    def current_points(self):
+        if not self._rates:
+            return float(self.mutation_points)
+        return sum(self._rates.values()) / len(self._rates)
+
+
+MUTATION_SCHEDULES = {
+    'fixed': FixedMutation,
+    'one_fifth': OneFifthRuleMutation,
+    'self_adaptive': SelfAdaptiveMutation,
+}
+
+
+def get_mutation_schedule(mutation_schedule):
+    """Get mutation schedule by its name or return given schedule object
+
+    Args:
+        mutation_schedule (str or object): one of ``MUTATION_SCHEDULES`` names or schedule object, 'fixed' if None
+
+    Returns:
+        object: mutation schedule
+    """
+    if mutation_schedule is None:
+        mutation_schedule = 'fixed'
+    if isinstance(mutation_schedule, str):
+        if mutation_schedule not in MUTATION_SCHEDULES:
+            raise ValueError('Unknown mutation_schedule {}, use one of {}'.format(
+                mutation_schedule, sorted(MUTATION_SCHEDULES)))
+        return MUTATION_SCHEDULES[mutation_schedule]()
+    return mutation_schedule
@@ -0,0 +1,128 @@
+"""
+``profiler`` is module with opt-in profiler of ``CartesianGenomeFunc`` evaluation: it collects number of calls,
+time and size of produced values per basis function and per node position over many ``call``.
+
+
+
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+
+
+class EvaluationProfiler:
+    """``EvaluationProfiler`` accumulates statistics of evaluated nodes: number of calls, cumulative time and bytes of
+    produced values (memory allocated by node result) by basis function and by node position (layer, row). Set it to
+    genome function with ``CartesianGenomeFunc.set_profiler``, it is safe to share one profiler between threads and
+    genome function clones
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget collected statistics
+
+        Returns:
+            None: nothing to return
+        """
+        with self._lock:
+            self._basis_stats = dict()
+            self._node_stats = dict()
+            self.n_calls = 0
+            self.total_seconds = 0.0
+
+    def record_call(self, nodes, seconds):
+        """Record one evaluation of genome function
+
+        Args:
+            nodes (list): evaluated nodes as (address, basis function, seconds, bytes of result), size of plain
+                python values is 0
+            seconds (float): time of whole evaluation
+
+        Returns:
+            None: nothing to return
+        """
+        with self._lock:
+            self.n_calls += 1
+            self.total_seconds += seconds
+            for address, layer_func, node_seconds, nbytes in nodes:
+                for stats, key in ((self._basis_stats, layer_func), (self._node_stats, (address, layer_func))):
+                    entry = stats.get(key)
+                    if entry is None:
+                        entry = stats[key] = [0, 0.0, 0]
+                    entry[0] += 1
+                    entry[1] += node_seconds
+                    entry[2] += nbytes
+
+    def report(self):
+        """Get collected statistics, entries are sorted by cumulative time, the slowest first
+
+        Returns:
+            dict: 'n_calls' and 'total_seconds' of genome function evaluations, 'basis' with list of dicts with
+            'function' name, 'calls', 'seconds', 'bytes' and 'seconds_per_call' for each basis function and 'nodes'
+            with the same dicts with 'address' (layer, row) for each node position and its function
+        """
+        def make_entry(entry, **keys):
+            calls, seconds, nbytes = entry
+            keys.update(calls=calls, seconds=seconds, bytes=nbytes, seconds_per_call=seconds / calls)
+            return keys
+
+        with self._lock:
+            basis = [make_entry(entry, function=layer_func.__name__)
+                     for layer_func, entry in self._basis_stats.items()]
+            nodes = [make_entry(entry, address=address, function=layer_func.__name__)
+                     for (address, layer_func), entry in self._node_stats.items()]
+            n_calls = self.n_calls
+            total_seconds = self.total_seconds
+        return {'n_calls': n_calls,
+                'total_seconds': total_seconds,
+                'basis': sorted(basis, key=lambda entry: -entry['seconds']),
+                'nodes': sorted(nodes, key=lambda entry: -entry['seconds'])}
+
+    def get_basis_costs(self):
+        """Get measured relative costs of basis functions: mean time per call, the cheapest function gets cost 1.
+        Could be used as ``basis_costs`` of cost-aware ``CartGenModel``
+
+        Returns:
+            dict: cost by function
+        """
+        with self._lock:
+            timings = {layer_func: max(seconds / calls, 1e-12)
+                       for layer_func, (calls, seconds, _) in self._basis_stats.items()}
+        if not timings:
+            return dict()
+        fastest = min(timings.values())
+        return {layer_func: timing / fastest for layer_func, timing in timings.items()}
+
+    def dump_collapsed(self, path):
+        """Write statistics in collapsed stacks format (``call;function;node weight`` lines) readable by flame graph
+        tools (flamegraph.pl, speedscope), weight is cumulative time in microseconds
+
+        Args:
+            path (str): path of file to write
+
+        Returns:
+            None: nothing to return
+        """
+        with self._lock:
+            lines = ['call;{};n{}_{} {}'.format(layer_func.__name__, address[0], address[1],
+                                                int(round(seconds * 1e6)))
+                     for (address, layer_func), (_, seconds, _) in sorted(
+                         self._node_stats.items(), key=lambda item: (item[0][1].__name__, item[0][0]))]
+        with open(path, 'w') as f:
+            f.writelines(line + '\n' for line in lines)
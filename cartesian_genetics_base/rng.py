@@ -0,0 +1,57 @@
+"""
+``rng`` is module with random streams of models: each model and genome function owns ``random.Random`` stream, so
+models in one process don't interfere, and seeds of independent child streams are spawned for parallel workers.
+
+
+
+
+
+
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import random
+import numpy as np
+
+
+def get_rng(seed=None):
+    """Get random stream for seed
+
+    Args:
+        seed (int or random.Random): seed of new stream, or stream which is returned as is. New stream is seeded from
+            system entropy if not set
+
+    Returns:
+        random.Random: random stream
+    """
+    if isinstance(seed, random.Random):
+        return seed
+    return random.Random(seed)
+
+
+def spawn_seeds(seed, n_children):
+    """Get seeds of independent child streams (for workers, islands, bagging members). Children of the same seed are
+    always the same, they are derived with ``numpy.random.SeedSequence``
+
+    Args:
+        seed (int): parent seed, children are seeded from system entropy if not set
+        n_children (int): number of child seeds
+
+    Returns:
+        list: list of int seeds
+    """
+    return [int(child.generate_state(1, np.uint64)[0]) for child in np.random.SeedSequence(seed).spawn(n_children)]
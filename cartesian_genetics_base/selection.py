@@ -0,0 +1,407 @@
+"""
+``selection`` is module with elite archive and selection strategies used by ``CartGenModel`` evolution process.
+
+
+
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import heapq
+import itertools
+
+
+class EliteArchive:
+    """``EliteArchive`` keeps ``size`` best (lowest score) distinct genomes. It is backed by heap with the worst elite
+    on top, so each insert costs O(log size)
+
+    Args:
+            size (int): number of elites to keep
+            replace_ties (bool): if True then new genome with score equal to the worst elite replaces it (the oldest
+                one of equal ones), otherwise new genome must be strictly better to get into full archive
+    """
+    def __init__(self, size, replace_ties=False):
+        if size < 1:
+            raise ValueError('Archive size must be positive, got {}'.format(size))
+        self.size = size
+        self.replace_ties = replace_ties
+        # entries are (-score, insertion number, genome key, genome), heap top is the worst and oldest elite
+        self._heap = list()
+        self._keys = set()
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, genome):
+        return tuple(genome) in self._keys
+
+    def push(self, genome, score):
+        """Try to insert genome with its score into archive
+
+        Args:
+            genome (list): genome to insert
+            score (float): score of genome, lower is better
+
+        Returns:
+            bool: True if genome got into archive
+        """
+        key = tuple(genome)
+        if key in self._keys:
+            return False
+        if score != score:
+            score = float('inf')
+
+        entry = (-score, next(self._counter), key, genome)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, entry)
+            self._keys.add(key)
+            return True
+
+        worst_score = -self._heap[0][0]
+        if score < worst_score or (self.replace_ties and score == worst_score):
+            evicted = heapq.heapreplace(self._heap, entry)
+            self._keys.discard(evicted[2])
+            self._keys.add(key)
+            return True
+
+        return False
+
+    def worst_score(self):
+        """Get score of the worst elite
+
+        Returns:
+            float: worst score in archive
+        """
+        return -self._heap[0][0]
+
+    def items(self):
+        """Get elites sorted from the best to the worst, equal scores are ordered from the newest
+
+        Returns:
+            list: list of (score, genome) tuples
+        """
+        return [(-neg_score, genome) for neg_score, _, _, genome in sorted(self._heap, reverse=True)]
+
+    def best(self):
+        """Get the best elite
+
+        Returns:
+            tuple: (score, genome) of the best elite
+        """
+        neg_score, _, _, genome = max(self._heap)
+        return -neg_score, genome
+
+
+class MuPlusLambdaSelection:
+    """``MuPlusLambdaSelection`` is (mu+lambda) strategy: every elite is a parent, and offspring compete with their
+    parents for a place in the archive
+    """
+    def make_archive(self, elitarity_n):
+        """Create archive for this strategy
+
+        Args:
+            elitarity_n (int): number of elites to keep
+
+        Returns:
+            EliteArchive: empty archive
+        """
+        return EliteArchive(elitarity_n)
+
+    def select_parents(self, archive, rng):
+        """Select parents for next generation
+
+        Args:
+            archive (EliteArchive): archive with current elites
+            rng (random.Random): random numbers source
+
+        Returns:
+            list: list of genomes to mutate
+        """
+        return [genome for _, genome in archive.items()]
+
+
+class TournamentSelection(MuPlusLambdaSelection):
+    """``TournamentSelection`` picks each parent as the best of ``tournament_size`` elites drawn at random, so better
+    elites get more offspring
+
+    Args:
+            tournament_size (int): number of elites competing in each tournament
+    """
+    def __init__(self, tournament_size=3):
+        self.tournament_size = tournament_size
+
+    def select_parents(self, archive, rng):
+        elites = archive.items()
+        parents = list()
+        for _ in range(len(elites)):
+            competitors = [rng.choice(elites) for _ in range(self.tournament_size)]
+            parents.append(min(competitors, key=lambda score_genome: score_genome[0])[1])
+        return parents
+
+
+class OnePlusLambdaSelection:
+    """``OnePlusLambdaSelection`` is classic CGP (1+lambda) strategy with neutral drift: single parent is replaced by
+    any offspring which is at least as good, ties go to the offspring. ``elitarity_n`` is ignored
+    """
+    def make_archive(self, elitarity_n):
+        return EliteArchive(1, replace_ties=True)
+
+    def select_parents(self, archive, rng):
+        return [archive.best()[1]]
+
+
+def non_dominated_sort(points):
+    """Split points into non-dominated fronts (all objectives are minimized): first front is not dominated by any
+    point, each next one is dominated only by points of previous fronts
+
+    Args:
+        points (list): list of tuples with objective values
+
+    Returns:
+        list: list of fronts, each is list of point indices
+    """
+    dominated_by = [list() for _ in points]
+    n_dominating = [0] * len(points)
+    for i, a in enumerate(points):
+        for j, b in enumerate(points):
+            if all(x <= y for x, y in zip(a, b)) and a != b:
+                dominated_by[i].append(j)
+                n_dominating[j] += 1
+
+    fronts = list()
+    front = [i for i in range(len(points)) if n_dominating[i] == 0]
+    while front:
+        fronts.append(front)
+        next_front = list()
+        for i in front:
+            for j in dominated_by[i]:
+                n_dominating[j] -= 1
+                if n_dominating[j] == 0:
+                    next_front.append(j)
+        front = next_front
+    return fronts
+
+
+def crowding_distances(points):
+    """Get NSGA-II crowding distance of points of one front: boundary points of each objective get infinite distance,
+    others get sum over objectives of normalized distance between their neighbours
+
+    Args:
+        points (list): list of tuples with objective values
+
+    Returns:
+        list: distance for each point
+    """
+    distances = [0.0] * len(points)
+    for objective in range(len(points[0]) if points else 0):
+        order = sorted(range(len(points)), key=lambda i: points[i][objective])
+        low, high = points[order[0]][objective], points[order[-1]][objective]
+        distances[order[0]] = distances[order[-1]] = float('inf')
+        value_range = high - low
+        if not 0 < value_range < float('inf'):
+            continue
+        for previous, current, following in zip(order, order[1:], order[2:]):
+            distances[current] += (points[following][objective] - points[previous][objective]) / value_range
+    return distances
+
+
+class ParetoArchive:
+    """``ParetoArchive`` keeps ``size`` genomes trading score against cost (both minimized) like NSGA-II: genomes are
+    ranked by non-dominated fronts, and overfull archive keeps the best fronts, the last of them is truncated by
+    crowding distance. Pushed genomes are truncated in batches (when archive is read or has twice ``size`` genomes),
+    so fronts are sorted about once per generation, not on each push. Genome dominated by ``size`` archived genomes
+    is rejected at once. Genome with the same score and cost as archived one replaces it
+
+    Args:
+            size (int): number of genomes to keep
+    """
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError('Archive size must be positive, got {}'.format(size))
+        self.size = size
+        # entries are (score, cost, genome key, genome), index of entry by its (score, cost)
+        self._entries = list()
+        self._keys = set()
+        self._objectives = dict()
+        self._ranking = None
+
+    def __len__(self):
+        self._truncate()
+        return len(self._entries)
+
+    def __contains__(self, genome):
+        return tuple(genome) in self._keys
+
+    def _rank(self, points):
+        # (front number, crowding distance) of each point
+        ranking = [None] * len(points)
+        for rank, front in enumerate(non_dominated_sort(points)):
+            for i, distance in zip(front, crowding_distances([points[i] for i in front])):
+                ranking[i] = (rank, distance)
+        return ranking
+
+    def _get_ranking(self):
+        self._truncate()
+        if self._ranking is None:
+            self._ranking = self._rank([(score, cost) for score, cost, _, _ in self._entries])
+        return self._ranking
+
+    def _truncate(self):
+        # NSGA-II environmental selection: the best fronts, then the least crowded (the oldest of equal) of last front
+        if len(self._entries) <= self.size:
+            return
+        ranking = self._rank([(score, cost) for score, cost, _, _ in self._entries])
+        kept = sorted(sorted(range(len(self._entries)), key=lambda i: (ranking[i][0], -ranking[i][1], i))[:self.size])
+        for i in set(range(len(self._entries))) - set(kept):
+            self._keys.discard(self._entries[i][2])
+        self._entries = [self._entries[i] for i in kept]
+        self._objectives = {(score, cost): i for i, (score, cost, _, _) in enumerate(self._entries)}
+        self._ranking = None
+
+    def _is_dominated_by_size(self, score, cost):
+        n_dominating = 0
+        for entry_score, entry_cost, _, _ in self._entries:
+            if entry_score <= score and entry_cost <= cost:
+                n_dominating += 1
+                if n_dominating >= self.size:
+                    return True
+        return False
+
+    def push(self, genome, score, cost):
+        """Try to insert genome with its score and cost into archive
+
+        Args:
+            genome (list): genome to insert
+            score (float): score of genome, lower is better
+            cost (float): evaluation cost of genome, lower is better
+
+        Returns:
+            bool: True if genome got into archive (it could be truncated later with next pushed genomes), False if
+            it is already archived or is dominated by ``size`` archived genomes
+        """
+        key = tuple(genome)
+        if key in self._keys:
+            return False
+        if score != score:
+            score = float('inf')
+
+        i = self._objectives.get((score, cost))
+        if i is not None:
+            # equal objectives: newer genome replaces older one (neutral drift), archive keeps distinct points
+            self._keys.discard(self._entries[i][2])
+            self._keys.add(key)
+            self._entries[i] = (score, cost, key, genome)
+            return True
+
+        # points dominating genome are in better fronts, so with size of them it would be truncated anyway
+        if len(self._entries) >= self.size and self._is_dominated_by_size(score, cost):
+            return False
+
+        self._objectives[(score, cost)] = len(self._entries)
+        self._entries.append((score, cost, key, genome))
+        self._keys.add(key)
+        self._ranking = None
+        if len(self._entries) >= 2 * self.size:
+            self._truncate()
+        return True
+
+    def ranked(self):
+        """Get genomes with their NSGA-II rank
+
+        Returns:
+            list: list of (front number, crowding distance, genome) tuples
+        """
+        return [(rank, distance, genome) for (rank, distance), (_, _, _, genome)
+                in zip(self._get_ranking(), self._entries)]
+
+    def worst_score(self):
+        """Get the worst score in archive
+
+        Returns:
+            float: worst score
+        """
+        self._truncate()
+        return max(score for score, _, _, _ in self._entries)
+
+    def items(self):
+        """Get genomes sorted by front and by score inside front, the first one has the best score
+
+        Returns:
+            list: list of (score, genome) tuples
+        """
+        ranking = self._get_ranking()
+        order = sorted(range(len(self._entries)), key=lambda i: (ranking[i][0], self._entries[i][0]))
+        return [(self._entries[i][0], self._entries[i][3]) for i in order]
+
+    def best(self):
+        """Get genome with the best score
+
+        Returns:
+            tuple: (score, genome)
+        """
+        return self.items()[0]
+
+    def front(self):
+        """Get non-dominated genomes sorted by cost
+
+        Returns:
+            list: list of (score, cost, genome) tuples
+        """
+        ranking = self._get_ranking()
+        return sorted(((score, cost, genome) for (rank, _), (score, cost, _, genome) in zip(ranking, self._entries)
+                       if rank == 0), key=lambda entry: (entry[1], entry[0]))
+
+
+class NSGA2Selection:
+    """``NSGA2Selection`` is multi-objective strategy for score and cost: archive is ``ParetoArchive``, each parent is
+    winner of binary tournament by NSGA-II crowded comparison (lower front, then larger crowding distance)
+    """
+    def make_archive(self, elitarity_n):
+        return ParetoArchive(elitarity_n)
+
+    def select_parents(self, archive, rng):
+        ranked = archive.ranked()
+        parents = list()
+        for _ in range(len(ranked)):
+            a, b = rng.choice(ranked), rng.choice(ranked)
+            parents.append(min(a, b, key=lambda entry: (entry[0], -entry[1]))[2])
+        return parents
+
+
+SELECTION_STRATEGIES = {
+    'mu_plus_lambda': MuPlusLambdaSelection,
+    'tournament': TournamentSelection,
+    'one_plus_lambda': OnePlusLambdaSelection,
+    'nsga2': NSGA2Selection,
+}
+
+
+def get_selection(selection):
+    """Get selection strategy by its name or return given strategy object
+
+    Args:
+        selection (str or object): one of ``SELECTION_STRATEGIES`` names or object with ``make_archive`` and
+            ``select_parents`` methods
+
+    Returns:
+        object: selection strategy
+    """
+    if isinstance(selection, str):
+        if selection not in SELECTION_STRATEGIES:
+            raise ValueError('Unknown selection {}, use one of {}'.format(selection, sorted(SELECTION_STRATEGIES)))
+        return SELECTION_STRATEGIES[selection]()
+    return selection
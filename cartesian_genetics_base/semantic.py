@@ -0,0 +1,92 @@
+"""
+``semantic`` is module with semantic fingerprints of genome functions: hash of outputs on small fixed probe set of
+samples. Structurally different genomes computing the same function have equal fingerprints, so ``CartGenModel`` can
+reuse score of known behaviour instead of evaluating genome on the full data.
+
+
+
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+
+def get_fingerprint(outputs, n_rows, decimals=6):
+    """Get fingerprint of genome function outputs on probe samples: hash of outputs rounded to ``decimals``, so
+    rounding noise of equivalent expressions (like ``(a+b)+c`` and ``a+(b+c)``) mostly doesn't change it
+
+    Args:
+        outputs (list): output values of genome function on probe samples, scalars are broadcast to ``n_rows``
+        n_rows (int): number of probe samples
+        decimals (int): number of decimals outputs are rounded to
+
+    Returns:
+        bytes: fingerprint
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for output in outputs:
+        values = np.round(np.broadcast_to(np.asarray(output, dtype=float), (n_rows, )), decimals)
+        # adding zero turns -0.0 into 0.0, all nans are replaced with the same nan
+        values = np.where(np.isnan(values), np.nan, values + 0.0)
+        digest.update(values.tobytes())
+    return digest.digest()
+
+
+class FingerprintTable:
+    """``FingerprintTable`` is bounded table of scores by fingerprint, when it is full the least recently used
+    fingerprint is dropped
+
+    Args:
+            size (int): maximal number of fingerprints
+    """
+    def __init__(self, size=10000):
+        self.size = size
+        self._scores = OrderedDict()
+
+    def __len__(self):
+        return len(self._scores)
+
+    def get(self, fingerprint):
+        """Get score of known fingerprint and mark it as recently used
+
+        Args:
+            fingerprint (bytes): fingerprint
+
+        Returns:
+            float: score, None if fingerprint is unknown
+        """
+        score = self._scores.get(fingerprint)
+        if score is not None:
+            self._scores.move_to_end(fingerprint)
+        return score
+
+    def put(self, fingerprint, score):
+        """Store score of fingerprint
+
+        Args:
+            fingerprint (bytes): fingerprint
+            score (float): score of genome function with this fingerprint
+
+        Returns:
+            None: nothing to return
+        """
+        self._scores[fingerprint] = score
+        self._scores.move_to_end(fingerprint)
+        while len(self._scores) > self.size:
+            self._scores.popitem(last=False)
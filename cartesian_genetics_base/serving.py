@@ -0,0 +1,180 @@
+"""
+``serving`` is module with helpers to serve fitted models online. ``AsyncBatchPredictor`` collects concurrent single
+row requests into micro-batches, so per-node python overhead of genome function evaluation is paid once per batch.
+
+
+
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import numpy as np
+
+_STOP = object()
+
+
+class AsyncBatchPredictor:
+    """``AsyncBatchPredictor`` wraps fitted model (anything with sklearn-like ``predict``) for asyncio servers. Each
+    ``predict`` call awaits one row, rows arriving together are stacked and predicted with one vectorised ``predict``
+    call. Batch is sent when it has ``max_batch_size`` rows or ``max_wait_ms`` passed since its first row arrived.
+    Model ``predict`` runs in ``executor`` so event loop keeps accepting requests meanwhile. Rows of wrong shape are
+    rejected before batching, and if batch prediction fails its rows are predicted one by one, so error of one
+    request doesn't fail other requests of batch
+
+    Args:
+            model (CartGenModel): fitted model
+            max_batch_size (int): maximum number of rows in one batch
+            max_wait_ms (float): maximum time to wait for more rows after the first row of batch
+            executor (concurrent.futures.Executor): executor to run ``model.predict`` in, default executor of event
+                loop if not set
+
+    Examples:
+
+        ::
+
+            async def handler(features):
+                return await predictor.predict(features)
+
+            async def main():
+                async with AsyncBatchPredictor(model, max_batch_size=128, max_wait_ms=1.0) as predictor:
+                    ...
+    """
+    def __init__(self, model, max_batch_size=64, max_wait_ms=2.0, executor=None):
+        if max_batch_size < 1:
+            raise ValueError('max_batch_size must be positive, got {}'.format(max_batch_size))
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.executor = executor
+        self._queue = None
+        self._worker = None
+        self._stopped = False
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def start(self):
+        """Start batching worker on running event loop, ``predict`` starts it automatically on first request
+
+        Returns:
+            None: nothing to return
+        """
+        if self._stopped:
+            raise RuntimeError('Predictor is stopped')
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Predict all already queued rows and stop batching worker
+
+        Returns:
+            None: nothing to return
+        """
+        self._stopped = True
+        if self._worker is not None:
+            await self._queue.put(_STOP)
+            await self._worker
+            self._worker = None
+
+    async def predict(self, row):
+        """Predict one row
+
+        Args:
+            row (numpy.array): 1d array with features of one sample, with ``model.n_inputs`` features if model has
+                this attribute
+
+        Returns:
+            numpy.array: row of ``model.predict`` output for this sample
+        """
+        if self._stopped:
+            raise RuntimeError('Predictor is stopped')
+        row = np.asarray(row)
+        n_inputs = getattr(self.model, 'n_inputs', None)
+        if row.ndim != 1 or (n_inputs is not None and row.shape[0] != n_inputs):
+            raise ValueError('Row must be 1d array with {} features, got shape {}'.format(
+                n_inputs if n_inputs is not None else 'model', row.shape))
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _collect_batch(self, first_item):
+        loop = asyncio.get_running_loop()
+        batch = [first_item]
+        deadline = loop.time() + self.max_wait_ms / 1000.0
+
+        while len(batch) < self.max_batch_size:
+            if self._queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self._queue.get_nowait()
+
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+
+        return batch, False
+
+    def _predict_rows(self, rows):
+        # errors are returned, not raised, so traceback handed to callers does not hold frame of worker coroutine
+        try:
+            return self.model.predict(np.vstack(rows)), None
+        except Exception as e:
+            return None, e
+
+    def _predict_batch(self, batch):
+        # (prediction, error) for each row, if batch fails rows are predicted one by one, so only bad rows fail
+        preds, error = self._predict_rows([row for row, _ in batch])
+        if error is None:
+            return [(pred, None) for pred in preds]
+        if len(batch) == 1:
+            return [(None, error)]
+        results = list()
+        for row, _ in batch:
+            preds, error = self._predict_rows([row])
+            results.append((None, error) if error is not None else (preds[0], None))
+        return results
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stop = False
+
+        while not stop:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch, stop = await self._collect_batch(item)
+
+            results = await loop.run_in_executor(self.executor, self._predict_batch, batch)
+            for (_, future), (pred, error) in zip(batch, results):
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(pred)
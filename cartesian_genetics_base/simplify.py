@@ -0,0 +1,299 @@
+"""
+``simplify`` is module with ``EvaluationGraph``: evaluation DAG built from active graphs of fitted
+``CartesianGenomeFunc``. While it is built, algebraic rules declared on basis functions are applied, constants are
+folded and structurally equal subexpressions are merged, so it computes the same outputs with fewer operations.
+
+
+
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from collections.abc import Sequence
+import numpy as np
+
+
+class Scale:
+    """``Scale`` is basis-like function multiplying its argument by constant, it replaces chains of scaling basis
+    functions (like ``neg``, ``div_2``, ``mult_3``) folded together
+
+    Args:
+            factor (float): multiplier
+    """
+    def __init__(self, factor):
+        self.factor = factor
+        self.rules = {'scale': factor}
+        self.expression = '({{0}} * {!r})'.format(factor)
+        self.scalar = self
+
+    def __call__(self, x):
+        return x*self.factor
+
+    def __eq__(self, other):
+        return isinstance(other, Scale) and other.factor == self.factor
+
+    def __hash__(self):
+        return hash(('scale', self.factor))
+
+    def __repr__(self):
+        return 'Scale({!r})'.format(self.factor)
+
+
+class EvaluationGraph:
+    """``EvaluationGraph`` is evaluation DAG with nodes of three kinds: inputs, constants and basis function
+    applications. Each node is created once, so equal subexpressions are shared. Rules are taken from ``rules`` dict
+    attribute of basis function (see ``cartesian_genetics_base.basis``):
+
+        * ``commutative`` (bool): arguments order does not matter, ``f(a, b)`` and ``f(b, a)`` are one node
+        * ``identity`` (float): for commutative function, ``f(x, identity)`` is ``x``
+        * ``involution`` (bool): ``f(f(x))`` is ``x``
+        * ``idempotent`` (bool): ``f(f(x))`` is ``f(x)``
+        * ``same_args_value`` (float): ``f(x, x)`` is this constant
+        * ``scale`` (float): ``f(x)`` is ``x*scale``, chains of such functions are folded into one ``Scale``
+
+    Function applied to constants only is folded into constant. Rules are exact algebraically, but not in floating
+    point for infinite or overflowing values, without ``apply_rules`` only identical nodes are merged, so outputs are
+    exactly the same as of added genome functions
+
+    Args:
+            n_inputs (int): number of inputs
+            apply_rules (bool): apply rules of basis functions and fold constants
+    """
+    def __init__(self, n_inputs, apply_rules=True):
+        self.n_inputs = n_inputs
+        self.apply_rules = apply_rules
+        # nodes are ('input', index), ('const', value) or ('op', function, argument node ids)
+        self._nodes = list()
+        self._node_ids = dict()
+        self._outputs = list()
+        self._order = None
+
+    @property
+    def outputs(self):
+        """List of output node ids"""
+        return self._outputs
+
+    @outputs.setter
+    def outputs(self, node_ids):
+        self._outputs = list(node_ids)
+        self._order = None
+
+    def _add(self, node):
+        node_id = self._node_ids.get(node)
+        if node_id is None:
+            node_id = len(self._nodes)
+            self._nodes.append(node)
+            self._node_ids[node] = node_id
+            self._order = None
+        return node_id
+
+    def input(self, index):
+        """Get node of input
+
+        Args:
+            index (int): input index
+
+        Returns:
+            int: node id
+        """
+        return self._add(('input', index))
+
+    def const(self, value):
+        """Get node of constant
+
+        Args:
+            value (float): constant value
+
+        Returns:
+            int: node id
+        """
+        return self._add(('const', value))
+
+    def _const_value(self, node_id):
+        node = self._nodes[node_id]
+        return node[1] if node[0] == 'const' else None
+
+    def _is_const(self, node_id):
+        return self._nodes[node_id][0] == 'const'
+
+    def op(self, func, args):
+        """Get node of basis function applied to argument nodes, simplified with rules of function (if
+        ``apply_rules``)
+
+        Args:
+            func (callable): basis function
+            args (list): argument node ids
+
+        Returns:
+            int: node id
+        """
+        args = tuple(args)
+        if not self.apply_rules:
+            return self._add(('op', func, args))
+        rules = getattr(func, 'rules', None) or dict()
+
+        if all(self._is_const(a) for a in args):
+            with np.errstate(all='ignore'):
+                return self.const(func(*[self._const_value(a) for a in args]))
+
+        if rules.get('same_args_value') is not None and len(args) > 1 and len(set(args)) == 1:
+            return self.const(rules['same_args_value'])
+
+        if rules.get('commutative'):
+            identity = rules.get('identity')
+            if identity is not None and len(args) == 2:
+                for a, other in [(args[0], args[1]), (args[1], args[0])]:
+                    if self._is_const(a) and self._const_value(a) == identity:
+                        return other
+            args = tuple(sorted(args))
+
+        if len(args) == 1:
+            arg_node = self._nodes[args[0]]
+            arg_func = arg_node[1] if arg_node[0] == 'op' else None
+            arg_rules = (getattr(arg_func, 'rules', None) or dict()) if arg_func is not None else dict()
+
+            if rules.get('involution') and arg_func is func:
+                return arg_node[2][0]
+
+            if rules.get('idempotent') and arg_func is func:
+                return args[0]
+
+            if rules.get('scale') is not None and arg_rules.get('scale') is not None:
+                factor = rules['scale']*arg_rules['scale']
+                if factor == 1:
+                    return arg_node[2][0]
+                return self.op(Scale(factor), arg_node[2])
+
+        return self._add(('op', func, args))
+
+    def add_genome_func(self, cgf, input_indices=None):
+        """Add active graph of genome function to this graph
+
+        Args:
+            cgf (CartesianGenomeFunc): genome function with genome set
+            input_indices (list): graph input index for each input of ``cgf``, identity if not set
+
+        Returns:
+            list: node ids of ``cgf`` outputs
+        """
+        nodes, output_addresses = cgf._get_active_graph()
+
+        node_ids = dict()
+
+        def node_id(address):
+            if address[0] == 0:
+                return self.input(address[1] if input_indices is None else input_indices[address[1]])
+            return node_ids[address]
+
+        for address, layer_func, input_addresses in nodes:
+            node_ids[address] = self.op(layer_func, [node_id(a) for a in input_addresses])
+
+        return [node_id(a) for a in output_addresses]
+
+    def _get_order(self):
+        # list of (op node id, ids of nodes not needed after it), node values are released as soon as they are dead
+        order = self._order
+        if order is None:
+            reachable = set()
+            to_visit = list(self.outputs)
+            while to_visit:
+                node_id = to_visit.pop()
+                if node_id in reachable:
+                    continue
+                reachable.add(node_id)
+                if self._nodes[node_id][0] == 'op':
+                    to_visit.extend(self._nodes[node_id][2])
+            # node ids are topologically sorted, arguments are always created before node
+            op_ids = [node_id for node_id in sorted(reachable) if self._nodes[node_id][0] == 'op']
+
+            last_use = dict()
+            for step, op_id in enumerate(op_ids):
+                for a in self._nodes[op_id][2]:
+                    last_use[a] = step
+            dead_after = [list() for _ in op_ids]
+            outputs = set(self.outputs)
+            for node_id, step in last_use.items():
+                if node_id not in outputs:
+                    dead_after[step].append(node_id)
+
+            order = [(op_id, tuple(dead)) for op_id, dead in zip(op_ids, dead_after)]
+            self._order = order
+        return order
+
+    @property
+    def n_ops(self):
+        """Number of basis function calls needed to compute outputs"""
+        return len(self._get_order())
+
+    def _evaluate(self, input_vals):
+        order = self._get_order()
+        values = dict()
+        shape = None
+        for node_id in set(self.outputs) | {a for op_id, _ in order for a in self._nodes[op_id][2]}:
+            node = self._nodes[node_id]
+            if node[0] == 'input':
+                values[node_id] = input_vals[node[1]]
+                shape = np.shape(values[node_id])
+            elif node[0] == 'const':
+                values[node_id] = node[1]
+        if shape is None:
+            shape = np.shape(input_vals[0]) if isinstance(input_vals, Sequence) and len(input_vals) > 0 else ()
+
+        for node_id, dead_ids in order:
+            _, func, args = self._nodes[node_id]
+            values[node_id] = func(*[values[a] for a in args])
+            for dead_id in dead_ids:
+                del values[dead_id]
+
+        return [np.full(shape, values[node_id]) if self._is_const(node_id) else values[node_id]
+                for node_id in self.outputs]
+
+    def call(self, input_vals):
+        """Compute outputs
+
+        Args:
+            input_vals (list): list of input values, or dict of them by input index
+
+        Returns:
+            list: output values, constant outputs are broadcast to shape of inputs
+        """
+        return self._evaluate(input_vals)
+
+
+def simplify_genome_func(cgf, sample_inputs, rtol=1e-7, atol=1e-9):
+    """Build simplified ``EvaluationGraph`` of genome function and check its equivalence numerically. Check is
+    required: rules are exact algebraically, but not in floating point for infinite or overflowing values
+
+    Args:
+        cgf (CartesianGenomeFunc): genome function with genome set
+        sample_inputs (list): list of input arrays to compare outputs of ``cgf`` and simplified graph on
+        rtol (float): relative tolerance of outputs comparison
+        atol (float): absolute tolerance of outputs comparison
+
+    Returns:
+        EvaluationGraph: simplified graph with ``outputs`` of ``cgf``
+    """
+    graph = EvaluationGraph(cgf._n_inputs)
+    graph.outputs = graph.add_genome_func(cgf)
+
+    with np.errstate(all='ignore'):
+        expected = cgf.call(sample_inputs)
+        simplified = graph.call(sample_inputs)
+    for i, (expected_output, output) in enumerate(zip(expected, simplified)):
+        if not np.allclose(output, expected_output, rtol=rtol, atol=atol, equal_nan=True):
+            raise ValueError('Simplified graph output {} differs from genome function output'.format(i))
+
+    return graph
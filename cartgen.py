@@ -21,10 +21,41 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-import random
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import logging
+from cartesian_genetics_base.basis import get_basis_cost, measure_basis_costs
+from cartesian_genetics_base.batch import count_rows, iter_blocks, prefetch
 from cartesian_genetics_base.cartesian_genome_func import CartesianGenomeFunc
+from cartesian_genetics_base.columns import RowsColumns, get_columns, get_n_rows, is_sparse
+from cartesian_genetics_base.ensemble import EnsembleGenomeFunc
+from cartesian_genetics_base.genome import Genome
+from cartesian_genetics_base.metrics import get_fast_metric
+from cartesian_genetics_base.mutation import get_mutation_schedule
+from cartesian_genetics_base.profiler import EvaluationProfiler
+from cartesian_genetics_base.rng import get_rng, spawn_seeds
+from cartesian_genetics_base.selection import get_selection
+from cartesian_genetics_base.semantic import FingerprintTable, get_fingerprint
+from cartesian_genetics_base.simplify import simplify_genome_func
+
+
+# thread pools of 'threads' predict backend by number of threads, shared by all models
+_thread_pools = dict()
+_thread_pools_lock = threading.Lock()
+
+
+def _get_thread_pool(n_threads):
+    with _thread_pools_lock:
+        pool = _thread_pools.get(n_threads)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=n_threads, thread_name_prefix='cartgen')
+            _thread_pools[n_threads] = pool
+        return pool
+
 
 class CartGenModel:
     """``CartGenModel`` is a class with model which could process any ML task (regression, classification, multiclass,
@@ -32,7 +63,9 @@ class CartGenModel:
     ``CartesianGenomeFunc`` and any custom metric.
 
     Args:
-            metric_to_minimize (callable): metric function with signature analogous to sklearn (see sklearn metrics) to minimize
+            metric_to_minimize (callable): metric function with signature analogous to sklearn (see sklearn metrics) to minimize,
+                called as ``metric_to_minimize(y_true, y_pred)``. Metrics from ``cartesian_genetics_base.metrics`` and
+                their sklearn equivalents are computed as batched numpy reductions
             n_generations (int): number of generations to evolve
             samples_in_gen (int): number of samples in each generation for each elitary sample
             elitarity_n (int): number of elite best samples to save
@@ -44,10 +77,54 @@ class CartGenModel:
             n_rows (int): number of functions on each layer of depth
             recurse_depth (int): depth of previous layers allowed to transmit inputs to each next level
             arity (int): arity of basis functions, if not set then would be determined automatically on given basis
-            seed (int): random seed for random operations (init_random_genome and such)
+            seed (int): seed of own random stream of model, stream is reset to it on each ``fit``, so seeded fits are
+                reproducible and don't interfere with other models. Use ``spawn`` for models with independent streams
             full_mutate_prob (float): probability of all possible mutation occurs for some individual
             basis_funcs (list): list of callable, basis functions for genome func representations
             cgf (CartesianGenomeFunc) : function to use as cgf if you don't want to create one
+            n_iter_no_change (int): stop evolution if monitored score was not improved by ``tol`` for this number of
+                generations, if not set then all ``n_generations`` are run
+            tol (float): minimal improvement of monitored score to reset ``n_iter_no_change`` counter
+            validation_fraction (float): fraction of train data held out to re-score elites after each generation,
+                if set then validation score is monitored for early stopping and best validated genome is kept
+            selection (str or object): selection strategy, one of 'mu_plus_lambda', 'tournament', 'one_plus_lambda'
+                or strategy object (see ``cartesian_genetics_base.selection``)
+            output_aggregation (str or callable): how scores of several outputs are combined when ``y`` has several
+                columns: 'mean', 'sum', 'max' or callable taking list of per-output scores
+            multiclass (str): if 'ovr' then ``y`` is treated as class labels and fitted one-vs-rest, one output per
+                class, all outputs share one graph evaluation. ``predict`` returns labels with the highest output
+            predict_backend (str): how fitted genome is evaluated in ``predict``: 'python' evaluates node by node,
+                'numexpr' evaluates whole active graph with multi-threaded numexpr (requires numexpr package),
+                'threads' evaluates independent nodes of each dependency level in ``n_jobs`` threads
+            mutation_schedule (str or object): how number of mutated points changes during evolution: 'fixed'
+                (``mutation_points`` always), 'one_fifth' (1/5th success rule), 'self_adaptive' (rate stored with each
+                elite) or schedule object (see ``cartesian_genetics_base.mutation``)
+            mutation_mode (str): which genes are mutated: 'point' (``mutation_points`` random genes), 'single_active'
+                (``mutation_points`` random genes, then random genes until one of active genes is changed) or
+                'probabilistic_active' (each gene with probability ``mutation_points/len(genome)``, repeated until one of
+                active genes is changed). Active modes never produce offspring with the same phenotype as parent
+            max_time_seconds (float): wall-clock budget of ``fit``: evolution stops before generation which is estimated
+                to end after the budget, best elites found so far are kept
+            max_evaluations (int): budget of genome evaluations on train data in ``fit``, offspring over the budget
+                are not evaluated and evolution stops
+            warm_start (bool): if set then ``fit`` of fitted model starts from its elites (or genome of given ``cgf``)
+                re-scored on new data instead of random genomes
+            cost_objective (str): how evaluation cost of genome (see ``CartesianGenomeFunc.get_cost``) is traded against
+                metric: None ignores cost, 'penalty' minimizes ``metric + cost_weight*cost``, 'pareto' keeps NSGA-II
+                archive of genomes non-dominated by score and cost (``selection`` is ignored), its front is stored in
+                ``pareto_front_`` and ``select_by_cost`` picks genome for cost budget
+            cost_weight (float): weight of cost in 'penalty' ``cost_objective``
+            basis_costs (dict or str): costs by basis function overriding ``cost`` declared on them, or 'measure' to
+                measure costs with micro-benchmark on ``fit`` (see ``cartesian_genetics_base.basis``)
+            n_jobs (int): number of threads of 'threads' ``predict_backend``, number of CPUs if not set
+            profile (bool): collect number of calls, time and bytes of results of basis functions and nodes
+                evaluated during fit into ``profile_`` (see ``cartesian_genetics_base.profiler.EvaluationProfiler``)
+            semantic_probe_size (int): number of fixed probe samples of semantic filter: new phenotype is evaluated
+                on them first and reuses score of known phenotype with the same rounded outputs (see
+                ``cartesian_genetics_base.semantic``), only new behaviours are evaluated on full data. Disabled if
+                not set
+            semantic_table_size (int): maximal number of fingerprints with scores kept by semantic filter
+            semantic_decimals (int): number of decimals probe outputs are rounded to by semantic filter
 
     Examples:
 
@@ -136,6 +213,9 @@ class CartGenModel:
             print(mean_absolute_error(test_preds,y_test))
 
     """
+    # upper bound of prediction elements stacked for one batched metric call
+    _scoring_batch_elements = 2 ** 22
+
     def __init__(self,
                  metric_to_minimize=None,
                  n_generations = 20,
@@ -152,11 +232,34 @@ class CartGenModel:
                  arity = None,
                  full_mutate_prob = 0.0,
                  seed = None,
-                 cgf = None):
-        """CGP Model for ML. Uses regression with cartesian genome function, optimized with elitarity N+lambda genetic process
+                 cgf = None,
+                 n_iter_no_change = None,
+                 tol = 0.0,
+                 validation_fraction = None,
+                 selection = 'mu_plus_lambda',
+                 output_aggregation = 'mean',
+                 multiclass = None,
+                 predict_backend = 'python',
+                 mutation_schedule = None,
+                 mutation_mode = 'point',
+                 max_time_seconds = None,
+                 max_evaluations = None,
+                 warm_start = False,
+                 cost_objective = None,
+                 cost_weight = 0.001,
+                 basis_costs = None,
+                 n_jobs = None,
+                 profile = False,
+                 semantic_probe_size = None,
+                 semantic_table_size = 10000,
+                 semantic_decimals = 6):
+        """CGP Model for ML. Uses regression with cartesian genome function, optimized with elitarity genetic process
+        ((mu+lambda) by default, see ``selection``)
 
         Args:
-            metric_to_minimize (callable): metric function with signature analogous to sklearn (see sklearn metrics) to minimize
+            metric_to_minimize (callable): metric function with signature analogous to sklearn (see sklearn metrics) to minimize,
+                called as ``metric_to_minimize(y_true, y_pred)``. Metrics from ``cartesian_genetics_base.metrics`` and
+                their sklearn equivalents are computed as batched numpy reductions
             n_generations (int): number of generations to evolve
             samples_in_gen (int): number of samples in each generation for each elitary sample
             elitarity_n (int): number of elite best samples to save
@@ -168,10 +271,54 @@ class CartGenModel:
             n_rows (int): number of functions on each layer of depth
             recurse_depth (int): depth of previous layers allowed to transmit inputs to each next level
             arity (int): arity of basis functions, if not set then would be determined automatically on given basis
-            seed (int): random seed for random operations (init_random_genome and such)
+            seed (int): seed of own random stream of model, stream is reset to it on each ``fit``, so seeded fits are
+                reproducible and don't interfere with other models. Use ``spawn`` for models with independent streams
             full_mutate_prob (float): probability of all possible mutation occurs for some individual
             basis_funcs (list): list of callable, basis functions for genome func representations
             cgf (CartesianGenomeFunc) : function to use as cgf if you don't want to create one
+            n_iter_no_change (int): stop evolution if monitored score was not improved by ``tol`` for this number of
+                generations, if not set then all ``n_generations`` are run
+            tol (float): minimal improvement of monitored score to reset ``n_iter_no_change`` counter
+            validation_fraction (float): fraction of train data held out to re-score elites after each generation,
+                if set then validation score is monitored for early stopping and best validated genome is kept
+            selection (str or object): selection strategy, one of 'mu_plus_lambda', 'tournament', 'one_plus_lambda'
+                or strategy object (see ``cartesian_genetics_base.selection``)
+            output_aggregation (str or callable): how scores of several outputs are combined when ``y`` has several
+                columns: 'mean', 'sum', 'max' or callable taking list of per-output scores
+            multiclass (str): if 'ovr' then ``y`` is treated as class labels and fitted one-vs-rest, one output per
+                class, all outputs share one graph evaluation. ``predict`` returns labels with the highest output
+            predict_backend (str): how fitted genome is evaluated in ``predict``: 'python' evaluates node by node,
+                'numexpr' evaluates whole active graph with multi-threaded numexpr (requires numexpr package),
+                'threads' evaluates independent nodes of each dependency level in ``n_jobs`` threads
+            mutation_schedule (str or object): how number of mutated points changes during evolution: 'fixed'
+                (``mutation_points`` always), 'one_fifth' (1/5th success rule), 'self_adaptive' (rate stored with each
+                elite) or schedule object (see ``cartesian_genetics_base.mutation``)
+            mutation_mode (str): which genes are mutated: 'point' (``mutation_points`` random genes), 'single_active'
+                (``mutation_points`` random genes, then random genes until one of active genes is changed) or
+                'probabilistic_active' (each gene with probability ``mutation_points/len(genome)``, repeated until one of
+                active genes is changed). Active modes never produce offspring with the same phenotype as parent
+            max_time_seconds (float): wall-clock budget of ``fit``: evolution stops before generation which is estimated
+                to end after the budget, best elites found so far are kept
+            max_evaluations (int): budget of genome evaluations on train data in ``fit``, offspring over the budget
+                are not evaluated and evolution stops
+            warm_start (bool): if set then ``fit`` of fitted model starts from its elites (or genome of given ``cgf``)
+                re-scored on new data instead of random genomes
+            cost_objective (str): how evaluation cost of genome (see ``CartesianGenomeFunc.get_cost``) is traded against
+                metric: None ignores cost, 'penalty' minimizes ``metric + cost_weight*cost``, 'pareto' keeps NSGA-II
+                archive of genomes non-dominated by score and cost (``selection`` is ignored), its front is stored in
+                ``pareto_front_`` and ``select_by_cost`` picks genome for cost budget
+            cost_weight (float): weight of cost in 'penalty' ``cost_objective``
+            basis_costs (dict or str): costs by basis function overriding ``cost`` declared on them, or 'measure' to
+                measure costs with micro-benchmark on ``fit`` (see ``cartesian_genetics_base.basis``)
+            n_jobs (int): number of threads of 'threads' ``predict_backend``, number of CPUs if not set
+            profile (bool): collect number of calls, time and bytes of results of basis functions and nodes
+                evaluated during fit into ``profile_`` (see ``cartesian_genetics_base.profiler.EvaluationProfiler``)
+            semantic_probe_size (int): number of fixed probe samples of semantic filter: new phenotype is evaluated
+                on them first and reuses score of known phenotype with the same rounded outputs (see
+                ``cartesian_genetics_base.semantic``), only new behaviours are evaluated on full data. Disabled if
+                not set
+            semantic_table_size (int): maximal number of fingerprints with scores kept by semantic filter
+            semantic_decimals (int): number of decimals probe outputs are rounded to by semantic filter
 
         Returns:
             CartesianGenomeFunc: constructed CG function representation
@@ -188,9 +335,28 @@ class CartGenModel:
         self.n_rows = n_rows
         self.basis_funcs = basis_funcs
         self.full_mutate_prob = full_mutate_prob
-        self.recurse_depth = 5
         self.arity = arity
         self.seed = seed
+        self.n_iter_no_change = n_iter_no_change
+        self.tol = tol
+        self.validation_fraction = validation_fraction
+        self.selection = selection
+        self.output_aggregation = output_aggregation
+        self.multiclass = multiclass
+        self.predict_backend = predict_backend
+        self.mutation_schedule = mutation_schedule
+        self.mutation_mode = mutation_mode
+        self.max_time_seconds = max_time_seconds
+        self.max_evaluations = max_evaluations
+        self.warm_start = warm_start
+        self.cost_objective = cost_objective
+        self.cost_weight = cost_weight
+        self.basis_costs = basis_costs
+        self.n_jobs = n_jobs
+        self.profile = profile
+        self.semantic_probe_size = semantic_probe_size
+        self.semantic_table_size = semantic_table_size
+        self.semantic_decimals = semantic_decimals
         if cgf is not None and isinstance(cgf, CartesianGenomeFunc):
             self.cgf = cgf
             self.not_fitted_yet = False
@@ -206,29 +372,54 @@ class CartGenModel:
 
         if self.arity is None:
             self.arity = self.cgf._arity
-        if seed is not None:
-            random.seed(seed)
+        self._rng = get_rng(seed)
         self.metric_to_minimize = metric_to_minimize
         self.tqdm = tqdm
         if tqdm is None:
             self.tqdm = lambda x: x
 
     def _set_initial_params(self, arity, basis_funcs, cgf, depth, elitarity_n, metric_to_minimize, mutation_points,
-                            n_generations, n_inputs, n_outputs, n_rows, recurse_depth, samples_in_gen, seed, tqdm,full_mutate_prob):
+                            n_generations, n_inputs, n_outputs, n_rows, recurse_depth, samples_in_gen, seed, tqdm,full_mutate_prob,
+                            n_iter_no_change=None, tol=0.0, validation_fraction=None, selection='mu_plus_lambda',
+                            output_aggregation='mean', multiclass=None, predict_backend='python',
+                            mutation_schedule=None, mutation_mode='point', max_time_seconds=None,
+                            max_evaluations=None, warm_start=False, cost_objective=None, cost_weight=0.001,
+                            basis_costs=None, n_jobs=None, profile=False, semantic_probe_size=None,
+                            semantic_table_size=10000, semantic_decimals=6):
         self.n_generations = n_generations
         self.samples_in_gen = samples_in_gen
         self.elitarity_n = elitarity_n
         self.mutation_points = mutation_points
         self.recurse_depth = recurse_depth
-        self.n_inputs = n_inputs,
+        self.n_inputs = n_inputs
         self.n_outputs = n_outputs
         self.depth = depth
         self.n_rows = n_rows
         self.basis_funcs = basis_funcs
-        self.recurse_depth = 5
         self.full_mutate_prob = full_mutate_prob
         self.arity = arity
         self.seed = seed
+        self.n_iter_no_change = n_iter_no_change
+        self.tol = tol
+        self.validation_fraction = validation_fraction
+        self.selection = selection
+        self.output_aggregation = output_aggregation
+        self.multiclass = multiclass
+        self.predict_backend = predict_backend
+        self.mutation_schedule = mutation_schedule
+        self.mutation_mode = mutation_mode
+        self.max_time_seconds = max_time_seconds
+        self.max_evaluations = max_evaluations
+        self.warm_start = warm_start
+        self.cost_objective = cost_objective
+        self.cost_weight = cost_weight
+        self.basis_costs = basis_costs
+        self.n_jobs = n_jobs
+        self.profile = profile
+        self.semantic_probe_size = semantic_probe_size
+        self.semantic_table_size = semantic_table_size
+        self.semantic_decimals = semantic_decimals
+        self.simplified_graph_ = None
         if cgf is not None and isinstance(cgf, CartesianGenomeFunc):
             self.cgf = cgf
             self.not_fitted_yet = False
@@ -241,38 +432,93 @@ class CartGenModel:
                                            recurse_depth=recurse_depth,
                                            arity=arity, seed=seed)
             self.not_fitted_yet = True
-        if seed is not None:
-            random.seed(seed)
+
+        if self.arity is None:
+            self.arity = self.cgf._arity
+        self._rng = get_rng(seed)
         self.metric_to_minimize = metric_to_minimize
         self.tqdm = tqdm
         if tqdm is None:
             self.tqdm = lambda x: x
 
-    def _get_mutated_samples(self, in_sample, n_points=1, new_samples_count=10, full_mutate_prob=0.0):
+    def _changes_active_gene(self, in_sample, changes, active_genes):
+        return any(index in active_genes and self._changes_gene(in_sample, index, value)
+                   for index, value in changes.items())
+
+    def _changes_gene(self, in_sample, index, value):
+        return self.cgf.decode_gene(index, value) != self.cgf.decode_gene(index, in_sample[index])
+
+    def _draw_changes(self, in_sample, points_to_do, active_genes=None, active_gene_list=None):
+        # returns changed genes and last changed gene index
+        changes = dict()
+        mutate_point = None
+        if self.mutation_mode == 'probabilistic_active':
+            rate = min(1.0, float(points_to_do) / len(in_sample))
+            while not self._changes_active_gene(in_sample, changes, active_genes):
+                # skipping genes which are not mutated, gaps between mutated genes are geometric
+                index = -1
+                while True:
+                    if rate < 1.0:
+                        index += int(math.log(1.0 - self._rng.random()) / math.log(1.0 - rate))
+                    index += 1
+                    if index >= len(in_sample):
+                        break
+                    changes[index] = self._rng.random()
+                    mutate_point = index
+            return changes, mutate_point
+
+        while points_to_do > 0:
+            mutate_point = self._rng.randrange(len(in_sample))
+            changes[mutate_point] = self._rng.random()
+            points_to_do -= 1
+
+        if self.mutation_mode == 'single_active':
+            # further genes are drawn from active ones, until the last drawn one changes its decoded value
+            changed = self._changes_active_gene(in_sample, changes, active_genes)
+            while not changed:
+                mutate_point = self._rng.choice(active_gene_list)
+                changes[mutate_point] = self._rng.random()
+                changed = self._changes_gene(in_sample, mutate_point, changes[mutate_point])
+        elif self.mutation_mode != 'point':
+            raise ValueError('Unknown mutation_mode {}, use one of {}'.format(
+                self.mutation_mode, ['point', 'single_active', 'probabilistic_active']))
+        return changes, mutate_point
+
+    def _get_mutated_samples(self, in_sample, n_points=1, new_samples_count=10, full_mutate_prob=0.0, mutation=None):
+        in_sample = Genome(in_sample)
+        active_genes = None
+        active_gene_list = None
+        if self.mutation_mode != 'point':
+            active_gene_list = self.cgf.get_active_genes(in_sample)
+            active_genes = set(active_gene_list)
         while new_samples_count != 0:
-            points_to_do = n_points
-            new_sample = [v for v in in_sample]
+            if mutation is not None:
+                sampled_points = mutation.sample(in_sample, self._rng)
+                points_to_do = max(1, int(round(sampled_points)))
+            else:
+                points_to_do = n_points
 
-            while points_to_do > 0:
-                mutate_point = random.choice([i for i in range(len(in_sample))])
-                new_sample[mutate_point] = random.random()
-                points_to_do -= 1
+            changes, mutate_point = self._draw_changes(in_sample, points_to_do, active_genes, active_gene_list)
+            new_sample = in_sample.mutate(changes)
 
             if full_mutate_prob>0:
-                if random.random()<full_mutate_prob:
+                if self._rng.random()<full_mutate_prob:
                     if mutate_point%3!=0:
                         n_to_mutate = self.arity*self.n_rows
                     else:
                         n_to_mutate = len(self.basis_funcs)
 
                     for i in range(n_to_mutate):
-                        returned_sample = [v for v in new_sample]
-                        returned_sample[mutate_point] = float(i)/n_to_mutate
+                        returned_sample = new_sample.mutate({mutate_point: float(i)/n_to_mutate})
+                        if mutation is not None:
+                            mutation.offspring(in_sample, returned_sample, sampled_points)
                         yield returned_sample
 
                     new_samples_count -= 1
                     continue
 
+            if mutation is not None:
+                mutation.offspring(in_sample, new_sample, sampled_points)
             yield new_sample
             new_samples_count -= 1
 
@@ -296,14 +542,39 @@ class CartGenModel:
                  'depth':self.depth,
                  'n_rows':self.n_rows,
                  'basis_funcs':self.basis_funcs,
-                 'recurse_depth':self.depth,
+                 'recurse_depth':self.recurse_depth,
                  'arity':self.arity,
                  'seed':self.seed,
                  'cgf':self.cgf,
-                 'full_mutate_prob':self.full_mutate_prob}
+                 'full_mutate_prob':self.full_mutate_prob,
+                 'n_iter_no_change':self.n_iter_no_change,
+                 'tol':self.tol,
+                 'validation_fraction':self.validation_fraction,
+                 'selection':self.selection,
+                 'output_aggregation':self.output_aggregation,
+                 'multiclass':self.multiclass,
+                 'predict_backend':self.predict_backend,
+                 'mutation_schedule':self.mutation_schedule,
+                 'mutation_mode':self.mutation_mode,
+                 'max_time_seconds':self.max_time_seconds,
+                 'max_evaluations':self.max_evaluations,
+                 'warm_start':self.warm_start,
+                 'cost_objective':self.cost_objective,
+                 'cost_weight':self.cost_weight,
+                 'basis_costs':self.basis_costs,
+                 'n_jobs':self.n_jobs,
+                 'profile':self.profile,
+                 'semantic_probe_size':self.semantic_probe_size,
+                 'semantic_table_size':self.semantic_table_size,
+                 'semantic_decimals':self.semantic_decimals}
+
+    # parameters defining shape of genome function, it is rebuilt when they are changed by set_params
+    _structure_params = ('n_inputs', 'n_outputs', 'depth', 'n_rows', 'recurse_depth', 'arity', 'basis_funcs')
 
     def set_params(self,**params):
-        """Set parameters of fitted estimator (sklearn interface here: https://scikit-learn.org/stable/developers/develop.html#cloning)
+        """Set parameters of fitted estimator (sklearn interface here: https://scikit-learn.org/stable/developers/develop.html#cloning).
+        Parameters which are not given keep their current values. Genome function is rebuilt (and model becomes
+        unfitted) if parameter of its shape is changed, otherwise it is kept with its genome
 
         Args:
             params(kwargs): parameters kwargs
@@ -312,74 +583,681 @@ class CartGenModel:
             CartGenModel: model with parameters from kwargs
         """
         if params:
-            self._set_initial_params(**params)
+            old_params = self.get_params()
+            new_params = dict(old_params, **params)
+            not_fitted_yet = self.not_fitted_yet
+            if 'cgf' not in params:
+                if any(new_params[name] != old_params[name] for name in self._structure_params):
+                    # genome function of other shape is built, genome of old one doesn't fit it
+                    new_params['cgf'] = None
+                    not_fitted_yet = True
+                    if 'basis_funcs' in params and 'arity' not in params:
+                        # arity is determined by new basis
+                        new_params['arity'] = None
+            self._set_initial_params(**new_params)
+            if 'cgf' not in params:
+                self.not_fitted_yet = not_fitted_yet
         return self
 
-    def fit(self, X, y):
-        """Fit X and y: run genetic evolution for some generations and acquire best learned CGF
+    def spawn(self, n_models):
+        """Get unfitted copies of model with independent random streams, for parallel workers, islands or bagging
+        members. Seeds of copies are derived from ``seed`` (see ``cartesian_genetics_base.rng.spawn_seeds``), so they
+        are the same for the same ``seed`` and fits of copies are reproducible in any execution order
 
         Args:
-            X (numpy.array): numpy array matrix with features to learn
-            y (numpy.array): numpy array matrix with target to learn
+            n_models (int): number of copies
 
         Returns:
-            CartGenModel: learned model with best learned self._cgf
+            list: list of ``CartGenModel``
         """
-        already_scored_cgp = dict()
-
-        cgf = self.cgf
+        models = list()
+        for seed in spawn_seeds(self.seed, n_models):
+            params = self.get_params()
+            # each copy builds its own genome function, so it neither shares nor inherits genome of this model
+            params.update(seed=seed, cgf=None)
+            models.append(CartGenModel(**params))
+        return models
+
+    def _split_validation(self, X, y):
+        if not self.validation_fraction:
+            return X, y, None, None
+
+        indices = list(range(X.shape[0]))
+        self._rng.shuffle(indices)
+        n_validation = int(round(len(indices) * self.validation_fraction))
+        if n_validation < 1 or n_validation >= len(indices):
+            raise ValueError('validation_fraction={} leaves empty train or validation part for {} samples'.format(
+                self.validation_fraction, len(indices)))
+
+        val_idx, train_idx = indices[:n_validation], indices[n_validation:]
+        return X[train_idx], y[train_idx], X[val_idx], y[val_idx]
+
+    def _aggregate_output_scores(self, output_scores):
+        # output_scores has one row per scored output and one column per candidate
+        if len(output_scores) == 1:
+            return list(output_scores[0])
+        if callable(self.output_aggregation):
+            return [self.output_aggregation(list(candidate_scores)) for candidate_scores in zip(*output_scores)]
+        aggregations = {'mean': np.mean, 'sum': np.sum, 'max': np.max}
+        if self.output_aggregation not in aggregations:
+            raise ValueError('Unknown output_aggregation {}, use one of {} or callable'.format(
+                self.output_aggregation, sorted(aggregations)))
+        return list(aggregations[self.output_aggregation](np.asarray(output_scores), axis=0))
+
+    def _score_genomes(self, genomes, X, y):
+        columns = get_columns(X)
+        targets = [y] if y.ndim == 1 else [y[:, i] for i in range(y.shape[1])]
+        fast_metric = get_fast_metric(self.metric_to_minimize)
+        if fast_metric is None:
+            output_scores = [list() for _ in targets]
+            for genome in genomes:
+                self.cgf.set_genome(genome)
+                outputs = self.cgf.call(columns)
+                for target, output, scores in zip(targets, outputs, output_scores):
+                    scores.append(self.metric_to_minimize(target, output))
+            return self._aggregate_output_scores(output_scores)
+
+        # predictions are scored in batches bounded by total number of elements
+        batch_size = max(1, self._scoring_batch_elements // max(1, y.shape[0] * len(targets)))
+        scores = list()
+        for batch_start in range(0, len(genomes), batch_size):
+            preds = [list() for _ in targets]
+            for genome in genomes[batch_start:batch_start + batch_size]:
+                self.cgf.set_genome(genome)
+                outputs = self.cgf.call(columns)
+                for target, output, target_preds in zip(targets, outputs, preds):
+                    target_preds.append(np.broadcast_to(output, target.shape))
+            scores.extend(self._aggregate_output_scores([fast_metric.batch(target, np.vstack(target_preds))
+                                                         for target, target_preds in zip(targets, preds)]))
+        return scores
+
+    def _get_semantic_filter(self, X, y):
+        # probe columns, number of probe samples and table of known fingerprints, None if filter is disabled.
+        # number of samples is taken from y, so no column of X is read here
+        if self.semantic_probe_size is None:
+            return None
+        n_rows = y.shape[0]
+        rows = np.array(sorted(self._rng.sample(range(n_rows), min(self.semantic_probe_size, n_rows))), dtype=int)
+        return RowsColumns(X, rows), len(rows), FingerprintTable(self.semantic_table_size)
+
+    def _filter_by_fingerprints(self, to_score, phenotype_scores, semantic_filter):
+        # phenotypes with known fingerprint reuse its score, phenotypes sharing new fingerprint are scored once.
+        # returns phenotypes to score on full data, their fingerprints and phenotypes scored as other phenotype
+        probe_columns, n_probe_rows, table = semantic_filter
+        new_to_score = dict()
+        fingerprints = dict()
+        same_behaviour = dict()
+        scored_fingerprints = dict()
+        for key, genome in to_score.items():
+            self.cgf.set_genome(genome)
+            fingerprint = get_fingerprint(self.cgf.call(probe_columns), n_probe_rows, self.semantic_decimals)
+            score = table.get(fingerprint)
+            if score is not None:
+                phenotype_scores[key] = score
+                self.n_semantic_hits_ += 1
+            elif fingerprint in scored_fingerprints:
+                same_behaviour[key] = scored_fingerprints[fingerprint]
+                self.n_semantic_hits_ += 1
+            else:
+                scored_fingerprints[fingerprint] = key
+                new_to_score[key] = genome
+                fingerprints[key] = fingerprint
+        return new_to_score, fingerprints, same_behaviour
+
+    def _score_phenotypes(self, genomes, X, y, phenotype_scores, semantic_filter=None):
+        # genomes with the same phenotype compute the same function, each phenotype is scored once, with semantic
+        # filter each behaviour on probe samples is scored once.
+        # returns scores and costs for 'pareto' cost_objective (None otherwise), 'penalty' is added to scores
+        keys = [self.cgf.get_phenotype_key(genome) for genome in genomes]
+        to_score = dict()
+        for key, genome in zip(keys, genomes):
+            if key not in phenotype_scores and key not in to_score:
+                to_score[key] = genome
+        fingerprints = dict()
+        same_behaviour = dict()
+        if semantic_filter is not None:
+            to_score, fingerprints, same_behaviour = self._filter_by_fingerprints(
+                to_score, phenotype_scores, semantic_filter)
+        for key, score in zip(to_score, self._score_genomes(list(to_score.values()), X, y)):
+            phenotype_scores[key] = score
+            if key in fingerprints:
+                semantic_filter[2].put(fingerprints[key], score)
+        for key, scored_key in same_behaviour.items():
+            phenotype_scores[key] = phenotype_scores[scored_key]
+        self.n_evaluations_ += len(to_score)
+
+        scores = [phenotype_scores[key] for key in keys]
+        if self.cost_objective is None:
+            return scores, None
+        costs = [self._get_phenotype_cost(key) for key in keys]
+        if self.cost_objective == 'penalty':
+            return [score + self.cost_weight * cost for score, cost in zip(scores, costs)], None
+        if self.cost_objective == 'pareto':
+            return scores, costs
+        raise ValueError('Unknown cost_objective {}, use None, \'penalty\' or \'pareto\''.format(self.cost_objective))
+
+    def _get_phenotype_cost(self, key):
+        nodes, _ = key
+        return sum(get_basis_cost(layer_func, self.basis_costs_) for _, layer_func, _ in nodes)
+
+    def _get_basis_costs(self):
+        if isinstance(self.basis_costs, str):
+            if self.basis_costs != 'measure':
+                raise ValueError('Unknown basis_costs {}, use dict or \'measure\''.format(self.basis_costs))
+            return measure_basis_costs(self.cgf._basis_funcs)
+        return self.basis_costs
+
+    def _get_genome_cost(self, genome):
+        return self._get_phenotype_cost(self.cgf.get_phenotype_key(genome))
+
+    def _get_cost_penalty(self, genome):
+        if self.cost_objective != 'penalty':
+            return 0.0
+        return self.cost_weight * self._get_genome_cost(genome)
+
+    def _push_scored(self, archive, genomes, scores, costs):
+        for i, (genome, score) in enumerate(zip(genomes, scores)):
+            if costs is None:
+                archive.push(genome, score)
+            else:
+                archive.push(genome, score, costs[i])
+
+    def _encode_target(self, y):
+        y = np.asarray(y)
+        if self.multiclass == 'ovr':
+            self.classes_, y_encoded = np.unique(y, return_inverse=True)
+            y = np.eye(len(self.classes_))[y_encoded]
+        elif self.multiclass is not None:
+            raise ValueError('Unknown multiclass {}, only \'ovr\' is supported'.format(self.multiclass))
+
+        n_targets = 1 if y.ndim == 1 else y.shape[1]
+        if n_targets > self.cgf._n_outputs:
+            raise ValueError('Target has {} columns but genome function has only {} outputs'.format(
+                n_targets, self.cgf._n_outputs))
+        return y
+
+    def _score_genome(self, genome, X, y):
+        return self._score_genomes([genome], X, y)[0]
+
+    def _set_top_from_archive(self, archive):
+        elites = archive.items()
+        self._top_scores = [score for score, _ in elites]
+        self._top_genomes = [genome for _, genome in elites]
+
+    def _estimate_remaining_seconds(self, elapsed, remaining_generations, generation_seconds):
+        # estimate by measured time of generation, bounded by budgets
+        estimates = [remaining_generations * generation_seconds]
+        if self.max_time_seconds is not None:
+            estimates.append(max(0.0, self.max_time_seconds - elapsed))
+        if self.max_evaluations is not None and self.n_evaluations_ > 0:
+            evaluations_per_second = self.n_evaluations_ / max(elapsed, 1e-9)
+            estimates.append(max(0, self.max_evaluations - self.n_evaluations_) / evaluations_per_second)
+        return min(estimates)
+
+    def _budget_stop_reason(self, elapsed, next_generation_seconds):
+        if self.max_evaluations is not None and self.n_evaluations_ >= self.max_evaluations:
+            return 'max_evaluations'
+        if self.max_time_seconds is not None and elapsed + next_generation_seconds > self.max_time_seconds:
+            return 'max_time_seconds'
+        return None
+
+    def _score_within_time(self, genomes, X, y, phenotype_scores, semantic_filter, start_time):
+        # genomes are scored batch by batch, scoring stops when the next batch is estimated to end after
+        # max_time_seconds. returns scores and costs of scored genomes, which are the first len(scores) genomes
+        batch_size = len(genomes) if self.max_time_seconds is None else max(1, self.elitarity_n)
+        scores = list()
+        costs = list()
+        batch_seconds = 0.0
+        for batch_start in range(0, len(genomes), batch_size):
+            batch_start_time = time.monotonic()
+            if self._budget_stop_reason(batch_start_time - start_time, batch_seconds) == 'max_time_seconds':
+                break
+            batch_scores, batch_costs = self._score_phenotypes(genomes[batch_start:batch_start + batch_size], X, y,
+                                                               phenotype_scores, semantic_filter)
+            scores.extend(batch_scores)
+            if batch_costs is not None:
+                costs.extend(batch_costs)
+            batch_seconds = time.monotonic() - batch_start_time
+        return scores, (costs if self.cost_objective == 'pareto' else None)
+
+    def _get_initial_genomes(self, n_genomes, init_genomes=None):
+        seed_genomes = list()
+        n_genes = len(self.cgf.get_genome())
+        if self.warm_start:
+            # only genome which was set (by fit or by user) and elites of previous fit of the same shape are taken,
+            # genome function built with model has placeholder genome
+            if self.cgf._plan is not None:
+                seed_genomes.append(self.cgf.get_genome())
+            seed_genomes.extend(genome for genome in getattr(self, '_top_genomes', list()) if len(genome) == n_genes)
+        if init_genomes is not None:
+            seed_genomes.extend(init_genomes)
+
+        genomes = list()
+        for genome in seed_genomes:
+            genome = Genome(genome)
+            if len(genome) != n_genes:
+                raise ValueError('Initial genome has {} genes, genome function needs {}'.format(len(genome), n_genes))
+            if genome not in genomes:
+                genomes.append(genome)
+
+        while len(genomes) < n_genomes:
+            self.cgf.init_random_genome(self._rng)
+            genomes.append(self.cgf.get_genome())
+        return genomes
+
+    def fit(self, X, y, init_genomes=None):
+        """Fit X and y: run genetic evolution for some generations and acquire best learned CGF.
+        Evolution stops earlier if ``n_iter_no_change`` is set and monitored score (validation score if
+        ``validation_fraction`` is set, best train score otherwise) was not improved by ``tol`` for that many
+        generations. Per-generation scores, number of mutated points and share of offspring better than their parents
+        are stored in ``self.history_``. Offspring with phenotype (active nodes and their connections) already seen
+        during evolution reuses its score instead of being evaluated again. Evolution also stops when
+        ``max_evaluations`` is spent or next generation is estimated to end after ``max_time_seconds``; why evolution
+        stopped is stored in ``self.stop_reason_``, each history record has elapsed time and estimate of remaining time.
+        Initial population is random, with ``warm_start`` it starts from elites of previous fit and ``init_genomes``
+        are added to it, all of them are re-scored on given data. With ``cost_objective`` history records have cost of
+        the best genome in ``best_cost``. With ``profile`` statistics of all evaluations of fit are stored in
+        ``self.profile_``. With ``semantic_probe_size`` number of phenotypes which reused score of known behaviour
+        instead of evaluation is stored in ``self.n_semantic_hits_``
 
-        cgf.init_random_genome()
+        Args:
+            X (numpy.array): numpy array matrix with features to learn, or scipy sparse matrix: its columns are
+                densified only when genome uses them
+            y (numpy.array): numpy array with target to learn, 1d for single output, 2d with one column per output
+                for multi-output fitting (or class labels if ``multiclass='ovr'``)
+            init_genomes (list): genomes to start evolution from, for example elites of model fitted on older data
 
-        preds = cgf.call([X[:, i] for i in range(X.shape[1])])[0]
-        self._top_scores = [self.metric_to_minimize(preds, y) for _ in range(self.elitarity_n)]
-        self._top_genomes = [cgf.get_genome() for _ in range(self.elitarity_n)]
+        Returns:
+            CartGenModel: learned model with best learned self._cgf
+        """
+        start_time = time.monotonic()
+        self.n_evaluations_ = 0
+        self.n_semantic_hits_ = 0
+        self.stop_reason_ = 'n_generations'
+        # hashes of genomes only (hash of Genome is cached), collision would just skip scoring of one offspring
+        already_scored_cgp = set()
+        phenotype_scores = dict()
+
+        self._rng = get_rng(self.seed)
+        y = self._encode_target(y)
+        if is_sparse(X):
+            X = X.tocsc()
+        X, y, X_val, y_val = self._split_validation(X, y)
+        # columns are taken once per fit, sparse columns are densified only when genome uses them
+        X = get_columns(X)
+        if X_val is not None:
+            X_val = get_columns(X_val)
+
+        self.basis_costs_ = self._get_basis_costs() if self.cost_objective is not None else None
+        previous_profiler = self.cgf.get_profiler()
+        if self.profile:
+            self.profile_ = EvaluationProfiler()
+            self.cgf.set_profiler(self.profile_)
+        semantic_filter = self._get_semantic_filter(X, y)
+        selection = get_selection('nsga2' if self.cost_objective == 'pareto' else self.selection)
+        archive = selection.make_archive(self.elitarity_n)
+
+        initial_genomes = self._get_initial_genomes(archive.size, init_genomes)
+        for genome in initial_genomes:
+            already_scored_cgp.add(hash(genome))
+        initial_start_time = time.monotonic()
+        self._push_scored(archive, initial_genomes, *self._score_phenotypes(initial_genomes, X, y, phenotype_scores,
+                                                                          semantic_filter))
+        self._set_top_from_archive(archive)
+        # until first generation is measured, its time is estimated by scoring time of initial population: generation
+        # scores samples_in_gen offspring of each parent
+        generation_seconds = (time.monotonic() - initial_start_time) * self.samples_in_gen
+
+        self.history_ = list()
+        best_monitored_score = None
+        best_validated_genome = None
+        generations_no_change = 0
+
+        mutation = get_mutation_schedule(self.mutation_schedule)
+        mutation.start(self.mutation_points)
 
         # learning genome for some generations
         for gen in self.tqdm(range(self.n_generations)):
+            generation_start_time = time.monotonic()
+            stop_reason = self._budget_stop_reason(generation_start_time - start_time, generation_seconds)
+            if stop_reason is not None:
+                logging.info('Stopping on generation {}: {} budget is spent'.format(gen, stop_reason))
+                self.stop_reason_ = stop_reason
+                break
+
+            parents = selection.select_parents(archive, self._rng)
+            parent_scores = {genome: score for score, genome in archive.items()}
+            offspring = list()
+            offspring_parents = list()
             for elitary_mutated_genomes in zip(*[
-                self._get_mutated_samples(self._top_genomes[_i_],
+                self._get_mutated_samples(parent,
                                           n_points=self.mutation_points,
                                           new_samples_count=self.samples_in_gen,
-                                          full_mutate_prob = self.full_mutate_prob)
-                                          for _i_ in range(len(self._top_genomes))]):
+                                          full_mutate_prob = self.full_mutate_prob,
+                                          mutation=mutation)
+                                          for parent in parents]):
 
-                    for new_sample in elitary_mutated_genomes:
-                        if tuple(new_sample) in already_scored_cgp:
+                    for parent, new_sample in zip(parents, elitary_mutated_genomes):
+                        if hash(new_sample) in already_scored_cgp:
                             continue
-                        already_scored_cgp[tuple(new_sample)] = 1
-                        cgf.set_genome(new_sample)
-                        new_preds = cgf.call([X[:, i] for i in range(X.shape[1])])[0]
-                        new_score = self.metric_to_minimize(new_preds, y)
-
-                        last_bigger = None
-                        already_in = False
-                        for i_, old_score in enumerate(self._top_scores):
-                            if new_score <= old_score:
-                                last_bigger = i_
-
-                        if (last_bigger is not None) and not already_in:
-                            self._top_scores[last_bigger] = new_score
-                            self._top_genomes[last_bigger] = cgf.get_genome()
+                        already_scored_cgp.add(hash(new_sample))
+                        offspring.append(new_sample)
+                        offspring_parents.append(parent)
+
+            if self.max_evaluations is not None:
+                # known phenotypes are not evaluated, so budget is never exceeded
+                offspring = offspring[:self.max_evaluations - self.n_evaluations_]
+                offspring_parents = offspring_parents[:len(offspring)]
+
+            n_successes = 0
+            offspring_scores, offspring_costs = self._score_within_time(offspring, X, y, phenotype_scores,
+                                                                        semantic_filter, start_time)
+            if len(offspring_scores) < len(offspring):
+                # time budget is spent in the middle of generation, it ends with offspring scored so far
+                offspring = offspring[:len(offspring_scores)]
+                offspring_parents = offspring_parents[:len(offspring_scores)]
+                self.stop_reason_ = 'max_time_seconds'
+            self._push_scored(archive, offspring, offspring_scores, offspring_costs)
+            for parent, score in zip(offspring_parents, offspring_scores):
+                if score < parent_scores[parent]:
+                    n_successes += 1
+
+            self._set_top_from_archive(archive)
+            mutation.update(len(offspring), n_successes, self._top_genomes)
+
+            generation_record = {'generation': gen,
+                                 'best_score': self._top_scores[0],
+                                 'mutation_points': mutation.current_points(),
+                                 'success_rate': n_successes / len(offspring) if offspring else 0.0}
+            if self.cost_objective is not None:
+                generation_record['best_cost'] = self._get_genome_cost(self._top_genomes[0])
+            monitored_score = generation_record['best_score']
+
+            if X_val is not None:
+                # re-scoring elites on held out part
+                val_scores = [(self._score_genome(g, X_val, y_val) + self._get_cost_penalty(g), g)
+                              for g in self._top_genomes]
+                monitored_score, val_genome = min(val_scores, key=lambda score_genome: score_genome[0])
+                generation_record['validation_score'] = monitored_score
+
+            generation_end_time = time.monotonic()
+            generation_seconds = generation_end_time - generation_start_time
+            generation_record['elapsed_seconds'] = generation_end_time - start_time
+            generation_record['n_evaluations'] = self.n_evaluations_
+            generation_record['estimated_remaining_seconds'] = self._estimate_remaining_seconds(
+                generation_record['elapsed_seconds'], self.n_generations - gen - 1, generation_seconds)
+
+            self.history_.append(generation_record)
+            if self.stop_reason_ == 'max_time_seconds':
+                logging.info('Stopping on generation {}: max_time_seconds budget is spent'.format(gen))
+                break
+
+            if best_monitored_score is None or monitored_score < best_monitored_score - self.tol:
+                best_monitored_score = monitored_score
+                generations_no_change = 0
+                if X_val is not None:
+                    best_validated_genome = val_genome
+            else:
+                generations_no_change += 1
+
+            if self.n_iter_no_change is not None and generations_no_change >= self.n_iter_no_change:
+                logging.info('Early stopping on generation {}: no improvement for {} generations'.format(
+                    gen, generations_no_change))
+                self.stop_reason_ = 'n_iter_no_change'
+                break
+
+        self.n_generations_ = len(self.history_)
+        self.cgf.set_profiler(previous_profiler)
+        if self.cost_objective == 'pareto':
+            self.pareto_front_ = archive.front()
 
         # setting learned genome to self._cgf
-        self.cgf.set_genome(self._top_genomes[-1])
+        if best_validated_genome is not None:
+            self.cgf.set_genome(best_validated_genome)
+        else:
+            self.cgf.set_genome(self._top_genomes[0])
+        self.simplified_graph_ = None
         self.not_fitted_yet = False
         return self
 
-    def predict(self, X):
-        """Predict X by running best fitted CGF function
+    def select_by_cost(self, max_cost):
+        """Set genome with the best train score among genomes of ``pareto_front_`` with cost not greater than
+        ``max_cost``, requires fit with ``cost_objective='pareto'``
 
         Args:
-            X (numpy.array): numpy array matrix with features to learn
-            y (numpy.array): numpy array matrix with target to learn
+            max_cost (float): cost budget (see ``CartesianGenomeFunc.get_cost``)
 
         Returns:
-            CartGenModel: learned model with best learned self._cgf
+            CartGenModel: model with selected genome
+        """
+        if getattr(self, 'pareto_front_', None) is None:
+            raise ValueError('Model has no pareto_front_, fit it with cost_objective=\'pareto\' first')
+        candidates = [(score, genome) for score, cost, genome in self.pareto_front_ if cost <= max_cost]
+        if not candidates:
+            raise ValueError('No genome with cost <= {}, the cheapest costs {}'.format(
+                max_cost, min(cost for _, cost, _ in self.pareto_front_)))
+        self.cgf.set_genome(min(candidates, key=lambda score_genome: score_genome[0])[1])
+        self.simplified_graph_ = None
+        return self
+
+    def simplify(self, X_sample, rtol=1e-7, atol=1e-9):
+        """Simplify fitted genome for serving: build evaluation graph of its active nodes with algebraic rules of basis
+        applied, constants folded and common subexpressions merged (see ``cartesian_genetics_base.simplify``). After
+        that ``predict`` with 'python' backend uses simplified graph until next ``fit``. Rules are not exact in
+        floating point for all values (``diff(x, x)`` is nan for infinite x, not 0), so simplified graph is always
+        checked to give the same outputs on sample representative of data to be predicted
+
+        Args:
+            X_sample (numpy.array): sample of features to check that simplified graph gives the same outputs, for
+                example part of training data
+            rtol (float): relative tolerance of outputs comparison
+            atol (float): absolute tolerance of outputs comparison
+
+        Returns:
+            CartGenModel: model with simplified graph
+        """
+        if self.not_fitted_yet:
+            logging.error('Model is not fitted! Use fit method or set_params method first!')
+            raise NotImplementedError()
+        self.simplified_graph_ = simplify_genome_func(self.cgf, get_columns(X_sample), rtol=rtol, atol=atol)
+        return self
+
+    def decision_function(self, X):
+        """Get raw outputs of best fitted CGF function
+
+        Args:
+            X (numpy.array): numpy array matrix with features, or scipy sparse matrix, structured array, dict of columns
+                by feature index or sequence of columns (see ``cartesian_genetics_base.columns``), only columns used by
+                fitted genome are read
+
+        Returns:
+            numpy.array: matrix with one column for each output of CGF
+        """
+        if self.not_fitted_yet:
+            logging.error('Model is not fitted! Use fit method or set_params method first!')
+            raise NotImplementedError()
+        columns = get_columns(X)
+        if self.predict_backend == 'numexpr':
+            test_preds = self.cgf.call_numexpr(columns)
+        elif self.predict_backend == 'threads':
+            test_preds = self.cgf.call_threaded(columns, _get_thread_pool(self.n_jobs or os.cpu_count() or 1))
+        elif self.predict_backend == 'python':
+            if getattr(self, 'simplified_graph_', None) is not None:
+                test_preds = self.simplified_graph_.call(columns)
+            else:
+                test_preds = self.cgf.call(columns)
+        else:
+            raise ValueError('Unknown predict_backend {}, use \'python\', \'numexpr\' or \'threads\''.format(
+                self.predict_backend))
+
+        # constant outputs of simplified graph are broadcast to number of samples, taken from column read anyway
+        n_rows = get_n_rows(X, self.cgf.get_used_inputs())
+        return np.vstack([np.broadcast_to(output, (n_rows, )) for output in test_preds]).T
+
+    def predict_iter(self, source, block_size=65536, prefetch_blocks=0, header=False, delimiter=','):
+        """Predict rows of out-of-core source block by block (see ``cartesian_genetics_base.batch.iter_blocks``)
+
+        Args:
+            source (object): path of ``.npy``, ``.npz`` or ``.csv`` file, 2d array or iterable of row blocks
+            block_size (int): number of rows predicted at once
+            prefetch_blocks (int): number of blocks read ahead by background thread, blocks are read on demand if 0
+            header (bool): skip first line of ``.csv`` file
+            delimiter (str): delimiter of ``.csv`` file
+
+        Returns:
+            generator: generator of ``predict`` results for consecutive blocks
+        """
+        blocks = iter_blocks(source, block_size, header=header, delimiter=delimiter)
+        if prefetch_blocks > 0:
+            blocks = prefetch(blocks, prefetch_blocks)
+        for block in blocks:
+            yield self.predict(block)
+
+    def predict_to_file(self, source, path, block_size=65536, prefetch_blocks=1, header=False, delimiter=','):
+        """Predict rows of out-of-core source into ``.npy`` file: output is preallocated as memory-mapped array and
+        filled block by block, so memory use doesn't depend on number of rows
+
+        Args:
+            source (object): path of ``.npy``, ``.npz`` or ``.csv`` file or 2d array, number of rows is counted before
+                prediction
+            path (str): path of output ``.npy`` file
+            block_size (int): number of rows predicted at once
+            prefetch_blocks (int): number of blocks read ahead by background thread, blocks are read on demand if 0
+            header (bool): skip first line of ``.csv`` file
+            delimiter (str): delimiter of ``.csv`` file
+
+        Returns:
+            numpy.memmap: read-only memory-mapped predictions
+        """
+        n_rows = count_rows(source, header=header)
+        output = None
+        start = 0
+        for preds in self.predict_iter(source, block_size, prefetch_blocks, header=header, delimiter=delimiter):
+            if output is None:
+                output = np.lib.format.open_memmap(path, mode='w+', dtype=preds.dtype,
+                                                   shape=(n_rows, ) + preds.shape[1:])
+            output[start:start + len(preds)] = preds
+            start += len(preds)
+        if output is None:
+            n_outputs = () if self.multiclass == 'ovr' else (self.cgf._n_outputs, )
+            output = np.lib.format.open_memmap(path, mode='w+', dtype=float, shape=(n_rows, ) + n_outputs)
+        output.flush()
+        del output
+        return np.load(path, mmap_mode='r')
+
+    def get_used_inputs(self):
+        """Get indices of features used by fitted genome, ``predict`` reads only these columns of column sources
+
+        Returns:
+            list: sorted feature indices
+        """
+        return self.cgf.get_used_inputs()
+
+    def predict_one(self, row):
+        """Predict single sample with low latency: compiled scalar function of active nodes is called on plain python
+        values, without numpy (see ``CartesianGenomeFunc.call_scalar``)
+
+        Args:
+            row (tuple): tuple of feature values of one sample
+
+        Returns:
+            tuple: output values, or class label if ``multiclass='ovr'``
         """
         if self.not_fitted_yet:
             logging.error('Model is not fitted! Use fit method or set_params method first!')
             raise NotImplementedError()
-        test_preds = self.cgf.call([X[:, i] for i in range(X.shape[1])])
+        outputs = self.cgf.call_scalar(tuple(row))
+        if self.multiclass == 'ovr':
+            n_classes = len(self.classes_)
+            return self.classes_[max(range(n_classes), key=outputs.__getitem__)]
+        return outputs
+
+    def predict(self, X):
+        """Predict X by running best fitted CGF function. Evaluation keeps no state on the model, so fitted model can
+        serve ``predict`` calls from several threads at once
+
+        Args:
+            X (numpy.array): numpy array matrix with features, or scipy sparse matrix, structured array, dict of columns
+                by feature index or sequence of columns (see ``cartesian_genetics_base.columns``), only columns used by
+                fitted genome are read
+
+        Returns:
+            numpy.array: matrix with one column for each output of CGF, or 1d array with class labels if
+            ``multiclass='ovr'``
+        """
+        outputs = self.decision_function(X)
+        if self.multiclass == 'ovr':
+            return self.classes_[np.argmax(outputs[:, :len(self.classes_)], axis=1)]
+        return outputs
+
+
+class CartGenEnsemble:
+    """``CartGenEnsemble`` serves ensemble of fitted ``CartGenModel`` (for example members of sklearn
+    ``BaggingRegressor``) with one evaluation: active graphs of all members are merged into one DAG with common
+    subexpressions computed once (see ``cartesian_genetics_base.ensemble``)
+
+    Args:
+            models (list): list of fitted ``CartGenModel``
+            feature_indices (list): for each model, list of feature indices it was fitted on (like
+                ``estimators_features_`` of sklearn bagging), all features if not set
+            n_features (int): number of features in ``X``, maximal feature index plus one if not set
 
-        return np.vstack(test_preds).T
+    Examples:
+
+        ::
+
+            from sklearn.ensemble import BaggingRegressor
+
+            bagging = BaggingRegressor(model, n_estimators=10).fit(X_train, y_train)
+            ensemble = CartGenEnsemble.from_bagging(bagging)
+            test_preds = ensemble.predict(X_test)
+    """
+    def __init__(self, models, feature_indices=None, n_features=None):
+        if feature_indices is None:
+            feature_indices = [list(range(model.cgf._n_inputs)) for model in models]
+        if n_features is None:
+            n_features = max(max(indices, default=-1) for indices in feature_indices) + 1
+
+        self.models = models
+        self.feature_indices = [list(indices) for indices in feature_indices]
+        self.n_features = n_features
+        self.ensemble_cgf = EnsembleGenomeFunc([model.cgf for model in models],
+                                               input_indices=self.feature_indices,
+                                               n_inputs=n_features)
+
+    @classmethod
+    def from_bagging(cls, bagging):
+        """Create ensemble from fitted sklearn bagging estimator with ``CartGenModel`` as base estimator
+
+        Args:
+            bagging (sklearn.ensemble.BaggingRegressor): fitted bagging estimator
+
+        Returns:
+            CartGenEnsemble: ensemble of bagging members
+        """
+        return cls(bagging.estimators_, feature_indices=bagging.estimators_features_,
+                   n_features=bagging.n_features_in_)
+
+    def predict_members(self, X):
+        """Predict X by every member
+
+        Args:
+            X (numpy.array): numpy array matrix with features, or scipy sparse matrix
+
+        Returns:
+            list: for each member, matrix with one column for each output of its CGF
+        """
+        columns = get_columns(X)
+        return [np.vstack(outputs).T for outputs in self.ensemble_cgf.call(columns)]
+
+    def predict(self, X):
+        """Predict X by averaging outputs of members
+
+        Args:
+            X (numpy.array): numpy array matrix with features, or scipy sparse matrix
+
+        Returns:
+            numpy.array: matrix with mean of members outputs, one column for each output
+        """
+        columns = get_columns(X)
+        return np.vstack(self.ensemble_cgf.call_mean(columns)).T
@@ -0,0 +1,79 @@
+"""
+This is tests for cartgen library.
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com 
+Full license in LICENSE file.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import tempfile
+import numpy as np
+from cartesian_genetics_base.batch import count_rows, iter_blocks, prefetch
+import unittest
+
+
+class TestIterBlocks(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.X = np.arange(21.0).reshape(7, 3)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def assertBlocks(self, blocks):
+        blocks = list(blocks)
+        self.assertListEqual([len(block) for block in blocks], [3, 3, 1])
+        np.testing.assert_allclose(np.vstack(blocks), self.X)
+
+    def test_files(self):
+        np.save(self.path('x.npy'), self.X)
+        np.savez(self.path('x.npz'), self.X)
+        np.savez(self.path('columns.npz'), a=self.X[:, 0], b=self.X[:, 1], c=self.X[:, 2])
+        np.savetxt(self.path('x.csv'), self.X, delimiter=',', header='a,b,c', comments='')
+
+        for name in ['x.npy', 'x.npz', 'columns.npz']:
+            self.assertBlocks(iter_blocks(self.path(name), block_size=3))
+            self.assertEqual(count_rows(self.path(name)), 7)
+        self.assertBlocks(iter_blocks(self.path('x.csv'), block_size=3, header=True))
+        self.assertEqual(count_rows(self.path('x.csv'), header=True), 7)
+
+    def test_arrays_and_iterables(self):
+        self.assertBlocks(iter_blocks(self.X, block_size=3))
+        self.assertBlocks(iter_blocks([self.X[:3].tolist(), self.X[3:6], self.X[6:]]))
+        with self.assertRaises(ValueError):
+            count_rows(iter([self.X]))
+        with self.assertRaises(ValueError):
+            iter_blocks('x.parquet')
+
+
+class TestPrefetch(unittest.TestCase):
+    def test_items_and_errors(self):
+        self.assertListEqual(list(prefetch(range(10), n_items=2)), list(range(10)))
+
+        def failing():
+            yield 1
+            raise ValueError('broken source')
+
+        items = prefetch(failing())
+        self.assertEqual(next(items), 1)
+        with self.assertRaises(ValueError):
+            next(items)
+
+    def test_early_stop(self):
+        items = prefetch(iter(range(1000)))
+        self.assertEqual(next(items), 0)
+        items.close()
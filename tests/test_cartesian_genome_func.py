@@ -17,6 +17,12 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 from cartesian_genetics_base.cartesian_genome_func import CartesianGenomeFunc
+from cartesian_genetics_base.profiler import EvaluationProfiler
+import copy
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import unittest
 
 class TestBoolCartesian(unittest.TestCase):
@@ -466,3 +472,251 @@ class TestBoolCartesian(unittest.TestCase):
 
         self.assertListEqual(result, result_must_be)
 
+
+    def test_call_before_genome_is_set(self):
+        def neg(x):
+            return not x
+
+        bc = CartesianGenomeFunc(n_inputs=1,
+                                 n_outputs=1,
+                                 depth=1,
+                                 basis_funcs=[neg,],
+                                 recurse_depth=1,
+                                 n_rows=1)
+
+        with self.assertRaises(RuntimeError):
+            bc.call([False,])
+
+    def test_call_keeps_no_state(self):
+        def summ(x,y):
+            return x+y
+
+        bc = CartesianGenomeFunc(n_inputs=2,
+                                 n_outputs=1,
+                                 depth=2,
+                                 basis_funcs=[summ,],
+                                 recurse_depth=2,
+                                 n_rows=1)
+        bc.set_genome([0.1, 0.1, 0.9, 0.1, 0.1, 0.6, 0.1])
+
+        # nested call from inside basis function must not corrupt outer call
+        def reentrant(x):
+            return bc.call([x, 100])[0]
+
+        outer = CartesianGenomeFunc(n_inputs=1, n_outputs=1, depth=1, basis_funcs=[reentrant,], n_rows=1)
+        outer.set_genome([0.1, 0.1, 0.1])
+
+        self.assertListEqual(bc.call([1, 2]), [4])
+        self.assertListEqual(outer.call([1]), [102])
+
+    def test_profiler(self):
+        def summ(x,y):
+            return x+y
+
+        bc = CartesianGenomeFunc(n_inputs=2,
+                                 n_outputs=1,
+                                 depth=2,
+                                 basis_funcs=[summ,],
+                                 recurse_depth=2,
+                                 n_rows=1)
+        bc.set_genome([0.1, 0.1, 0.9, 0.1, 0.1, 0.6, 0.1])
+        profiler = EvaluationProfiler()
+        bc.set_profiler(profiler)
+
+        np.testing.assert_allclose(bc.call([np.ones(4), np.ones(4)])[0], np.full(4, 3.0))
+        self.assertListEqual(bc.clone().call([1, 2]), [4])
+        report = profiler.report()
+        self.assertEqual(report['n_calls'], 2)
+        self.assertEqual(report['basis'][0]['calls'], 4)
+        self.assertEqual(report['basis'][0]['bytes'], 2 * np.ones(4).nbytes)
+        self.assertListEqual(sorted(entry['address'] for entry in report['nodes']), [(1, 0), (2, 0)])
+
+    def test_deep_grid_decodes_only_active_nodes(self):
+        def neg(x):
+            return -x
+
+        decoded = list()
+
+        class CountingGenomeFunc(CartesianGenomeFunc):
+            def _decode_node(self, genome, address):
+                decoded.append(address)
+                return super()._decode_node(genome, address)
+
+        depth = 100000
+        bc = CountingGenomeFunc(n_inputs=1,
+                                n_outputs=1,
+                                depth=depth,
+                                basis_funcs=[neg,],
+                                recurse_depth=depth,
+                                n_rows=1)
+        # all nodes take input, output takes the last node
+        bc.set_genome([0.999999999] * 2 * depth + [0.0])
+
+        self.assertListEqual(bc.call([5]), [-5])
+        self.assertListEqual(decoded, [(depth, 0)])
+        self.assertListEqual(bc.get_active_genes(), [2*depth-2, 2*depth-1, 2*depth])
+
+    def test_call_scalar(self):
+        def summ(x,y):
+            return x+y
+
+        def m_one(x):
+            return x-1
+
+        bc = CartesianGenomeFunc(n_inputs=3,
+                                 n_outputs=2,
+                                 depth=2,
+                                 basis_funcs=[summ, m_one],
+                                 recurse_depth=1,
+                                 n_rows=2)
+        bc.set_genome([0.1, 0.9, 0.5, 0.8, 0.1, 0.1, 0.1,0.1, 0.1, 0.1,0.1, 0.1, 0.1, 0.1])
+
+        self.assertTupleEqual(bc.call_scalar((1, 2, 10)), (24, 24))
+        self.assertIs(bc.compile_scalar(), bc.compile_scalar())
+
+    def test_call_scalar_uses_scalar_attribute_and_passes_inputs(self):
+        def neg(x):
+            return not x
+        neg.scalar = lambda x: 'scalar'
+
+        bc = CartesianGenomeFunc(n_inputs=2,
+                                 n_outputs=2,
+                                 depth=1,
+                                 basis_funcs=[neg,],
+                                 recurse_depth=2,
+                                 n_rows=1)
+        # first output is node, second output is second input passed through
+        bc.set_genome([0.1, 0.1, 0.1, 0.9])
+
+        self.assertTupleEqual(bc.call_scalar((True, False)), ('scalar', False))
+        self.assertListEqual(bc.call([True, False]), [False, False])
+
+    def test_active_genes_and_phenotype_key(self):
+        def summ(x,y):
+            return x+y
+
+        def neg(x):
+            return -x
+
+        bc = CartesianGenomeFunc(n_inputs=2,
+                                 n_outputs=1,
+                                 depth=2,
+                                 basis_funcs=[summ, neg],
+                                 recurse_depth=2,
+                                 n_rows=1)
+        genome = [0.6, 0.1, 0.9, 0.1, 0.1, 0.6, 0.1]
+        bc.set_genome(genome)
+
+        # neg uses one input, so second input gene of first node is inactive
+        self.assertListEqual(bc.get_active_genes(), [0, 1, 3, 4, 5, 6])
+        self.assertListEqual(bc.get_active_genes([0.1, 0.1, 0.9, 0.1, 0.1, 0.6, 0.9]), [0, 1, 2, 6])
+        self.assertListEqual([bc.decode_gene(i, v) for i, v in enumerate(genome)],
+                             [1, (0, 0), (0, 1), 0, (1, 0), (0, 0), (2, 0)])
+
+        self.assertEqual(bc.get_cost(), 2.0)
+        self.assertEqual(bc.get_cost({neg: 5.0}), 6.0)
+        self.assertEqual(bc.get_cost(genome=[0.1, 0.1, 0.9, 0.1, 0.1, 0.6, 0.9]), 1.0)
+        self.assertEqual(bc.get_phenotype_key([0.6, 0.1, 0.2, 0.1, 0.1, 0.6, 0.1]), bc.get_phenotype_key())
+        self.assertEqual(bc.get_phenotype_key([0.7, 0.1, 0.9, 0.1, 0.1, 0.6, 0.1]), bc.get_phenotype_key())
+        self.assertNotEqual(bc.get_phenotype_key([0.1, 0.1, 0.9, 0.1, 0.1, 0.6, 0.1]), bc.get_phenotype_key())
+
+    def test_call_releases_dead_values(self):
+        results = list()
+        alive_counts = list()
+
+        def track(x):
+            result = x + 1
+            alive_counts.append(sum(ref() is not None for ref in results))
+            results.append(weakref.ref(result))
+            return result
+
+        bc = CartesianGenomeFunc(n_inputs=1,
+                                 n_outputs=1,
+                                 depth=10,
+                                 basis_funcs=[track],
+                                 recurse_depth=1,
+                                 n_rows=1)
+        # chain of 10 nodes, each one reads previous
+        bc.set_genome([0.0, 0.0] * 10 + [0.0])
+
+        outputs = bc.call([np.zeros(3)])
+        np.testing.assert_allclose(outputs[0], np.full(3, 10.0))
+        # only argument of current node is alive
+        self.assertLessEqual(max(alive_counts), 1)
+        self.assertEqual(bc.get_max_live_values(), 2)
+
+    def test_call_threaded(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait_summ(x, y):
+            # fails if the other node of layer is not evaluated at the same time
+            barrier.wait()
+            return x+y
+
+        def diff(x, y):
+            return x-y
+
+        bc = CartesianGenomeFunc(n_inputs=2,
+                                 n_outputs=2,
+                                 depth=2,
+                                 basis_funcs=[wait_summ, diff],
+                                 recurse_depth=2,
+                                 n_rows=2)
+        # layer 1: wait_summ(x0, x1) and wait_summ(x1, x1), layer 2: diff of them, outputs are layer 2 node and
+        # the first node of layer 1
+        bc.set_genome([0.1, 0.1, 0.6, 0.1, 0.9, 0.9,
+                       0.9, 0.1, 0.3, 0.9, 0.1, 0.1,
+                       0.1, 0.6])
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            outputs = bc.call_threaded([1, 2], executor)
+
+        self.assertListEqual(outputs, [-1, 3])
+        self.assertListEqual([len(level_nodes) for level_nodes, _ in bc._get_from_plan_cache(
+            bc._plan, 'levels', bc._build_levels)], [2, 1])
+
+    def test_call_threaded_with_constant_node(self):
+        def one():
+            return 1.0
+
+        def summ(x, y):
+            return x+y
+
+        bc = CartesianGenomeFunc(n_inputs=1,
+                                 n_outputs=1,
+                                 depth=2,
+                                 basis_funcs=[one, summ],
+                                 recurse_depth=2,
+                                 n_rows=1)
+        # layer 1: one(), layer 2: summ of it and x0
+        bc.set_genome([0.1, 0.5, 0.5, 0.9, 0.1, 0.9, 0.1])
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertListEqual(bc.call_threaded([2.0], executor), [3.0])
+        self.assertListEqual(bc.call([2.0]), [3.0])
+
+    def test_clone(self):
+        def summ(x,y):
+            return x+y
+
+        bc = CartesianGenomeFunc(n_inputs=2,
+                                 n_outputs=1,
+                                 depth=2,
+                                 basis_funcs=[summ,],
+                                 recurse_depth=2,
+                                 n_rows=1)
+        bc.set_genome([0.1, 0.1, 0.9, 0.1, 0.1, 0.6, 0.1])
+
+        bc.call([1, 2])
+        for clone in [bc.clone(), copy.deepcopy(bc)]:
+            self.assertIs(clone.get_genome(), bc.get_genome())
+            self.assertIsNot(clone._plan[2], bc._plan[2])
+            self.assertIs(clone._plan[2]['active_graph'], bc._plan[2]['active_graph'])
+            self.assertListEqual(clone.call([1, 2]), [4])
+            clone.compile_scalar()
+            self.assertNotIn('scalar_func', bc._plan[2])
+
+            clone.set_genome([0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1])
+            self.assertListEqual(clone.call([1, 2]), [4])
+            self.assertListEqual(bc.call([1, 2]), [4])
+            self.assertNotEqual(clone.get_genome(), bc.get_genome())
@@ -0,0 +1,551 @@
+"""
+This is tests for cartgen library.
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com 
+Full license in LICENSE file.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import copy
+import itertools
+import os
+import random
+import tempfile
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from inspect import signature
+from cartgen import CartGenModel, CartGenEnsemble
+from cartesian_genetics_base import metrics
+from cartesian_genetics_base.basis import BASIS
+import unittest
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+
+def summ(x, y):
+    return x+y
+
+
+def diff(x, y):
+    return x-y
+
+
+def mult(x, y):
+    return x*y
+
+
+def neg(x):
+    return -x
+
+
+def mae(preds, y):
+    return np.mean(np.abs(preds-y))
+
+
+def make_data(n_samples=200, seed=0):
+    rng = np.random.RandomState(seed)
+    X = rng.normal(size=(n_samples, 3))
+    y = X[:, 0]*X[:, 1]+X[:, 2]
+    return X, y
+
+
+def make_model(**kwargs):
+    params = dict(metric_to_minimize=mae,
+                  n_generations=30,
+                  samples_in_gen=10,
+                  elitarity_n=3,
+                  mutation_points=2,
+                  n_inputs=3,
+                  n_outputs=1,
+                  depth=6,
+                  n_rows=2,
+                  recurse_depth=3,
+                  basis_funcs=[summ, diff, mult, neg],
+                  seed=1)
+    params.update(kwargs)
+    return CartGenModel(**params)
+
+
+class TestCartGenModel(unittest.TestCase):
+    def test_fit_predict(self):
+        X, y = make_data()
+        model = make_model().fit(X, y)
+
+        preds = model.predict(X)
+
+        self.assertEqual(preds.shape, (X.shape[0], 1))
+        self.assertEqual(model.n_generations_, 30)
+        self.assertEqual(len(model.history_), 30)
+
+    def test_concurrent_predict(self):
+        X, y = make_data(n_samples=2000)
+        model = make_model(n_generations=5).fit(X, y)
+        batches = [X[i::8] for i in range(8)]
+        expected = [model.predict(batch) for batch in batches]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(model.predict, batches*10))
+
+        for i, result in enumerate(results):
+            np.testing.assert_array_equal(result, expected[i % 8])
+
+    def test_predict_one(self):
+        X, y = make_data()
+        model = make_model(basis_funcs=BASIS, n_outputs=2, depth=20).fit(X, y)
+        preds = model.predict(X)
+
+        for i in range(20):
+            np.testing.assert_allclose(model.predict_one(tuple(X[i])), preds[i])
+
+        # scalar versions of basis functions agree with numpy ones on special values too
+        values = [np.nan, np.inf, -np.inf, 0.0, -0.1, -0.00001, 2.5]
+        with np.errstate(all='ignore'):
+            for func in BASIS:
+                for args in itertools.product(values, repeat=len(signature(func).parameters)):
+                    expected = func(*[np.array([value]) for value in args])[0]
+                    np.testing.assert_allclose(func.scalar(*args), expected, err_msg=func.__name__)
+
+    @unittest.skipIf(numexpr is None, 'numexpr is not installed')
+    def test_numexpr_backend(self):
+        X, y = make_data()
+
+        def clip(x):
+            return np.clip(x, -1, 1)
+
+        for depth, recurse_depth in [(20, 3), (200, 200)]:
+            model = make_model(basis_funcs=BASIS+[clip], n_outputs=3, depth=depth, recurse_depth=recurse_depth,
+                               n_generations=3).fit(X, y)
+            numexpr_model = make_model(cgf=model.cgf, predict_backend='numexpr')
+
+            np.testing.assert_allclose(numexpr_model.predict(X), model.predict(X), rtol=1e-10)
+
+        used_inputs, steps, outputs = model.cgf.get_numexpr_program()
+        self.assertTrue(all(isinstance(output, str) for output in outputs))
+
+    def test_simplify(self):
+        X, y = make_data()
+        model = make_model(basis_funcs=BASIS, n_outputs=2, depth=30).fit(X, y)
+        preds = model.predict(X)
+
+        model.simplify(X[:50])
+
+        self.assertIsNotNone(model.simplified_graph_)
+        np.testing.assert_allclose(model.predict(X), preds)
+
+    def test_params_round_trip(self):
+        model = make_model(recurse_depth=4)
+        params = model.get_params()
+
+        self.assertEqual(params['recurse_depth'], 4)
+        self.assertEqual(params['n_inputs'], 3)
+
+        model.set_params(n_generations=7)
+        self.assertEqual(model.n_generations, 7)
+        self.assertEqual(model.get_params()['n_inputs'], 3)
+        self.assertIs(model.get_params()['cgf'], params['cgf'])
+
+    def test_copy_shares_genomes(self):
+        X, y = make_data()
+        model = make_model(n_generations=3).fit(X, y)
+
+        model_copy = copy.deepcopy(model)
+
+        self.assertIsNot(model_copy.cgf, model.cgf)
+        self.assertIs(model_copy.cgf.get_genome(), model.cgf.get_genome())
+        self.assertIs(model_copy._top_genomes[0], model._top_genomes[0])
+        np.testing.assert_array_equal(model_copy.predict(X), model.predict(X))
+
+    def test_selection_strategies(self):
+        X, y = make_data()
+        for selection in ['mu_plus_lambda', 'tournament', 'one_plus_lambda']:
+            model = make_model(selection=selection).fit(X, y)
+            scores = [record['best_score'] for record in model.history_]
+
+            self.assertListEqual(scores, sorted(scores, reverse=True))
+            self.assertEqual(mae(model.predict(X)[:, 0], y), scores[-1])
+
+    def test_fast_metric_same_result(self):
+        X, y = make_data()
+        fast_model = make_model(metric_to_minimize=metrics.mean_absolute_error).fit(X, y)
+        model = make_model().fit(X, y)
+
+        self.assertEqual(fast_model.cgf.get_genome(), model.cgf.get_genome())
+        np.testing.assert_allclose([record['best_score'] for record in fast_model.history_],
+                                   [record['best_score'] for record in model.history_])
+
+    def test_multi_output(self):
+        X, y = make_data()
+        Y = np.vstack([y, X[:, 0]-X[:, 2]]).T
+        for metric in [mae, metrics.mean_absolute_error]:
+            model = make_model(n_outputs=2, metric_to_minimize=metric).fit(X, Y)
+            preds = model.predict(X)
+
+            self.assertEqual(preds.shape, (X.shape[0], 2))
+            self.assertAlmostEqual(model.history_[-1]['best_score'],
+                                   np.mean([mae(preds[:, i], Y[:, i]) for i in range(2)]))
+
+        model = make_model(n_outputs=2, output_aggregation=max).fit(X, Y)
+        preds = model.predict(X)
+        self.assertAlmostEqual(model.history_[-1]['best_score'], max(mae(preds[:, i], Y[:, i]) for i in range(2)))
+
+    def test_multi_output_too_many_targets(self):
+        X, y = make_data()
+        with self.assertRaises(ValueError):
+            make_model(n_outputs=1).fit(X, np.vstack([y, y]).T)
+
+    def test_multiclass_ovr(self):
+        X, _ = make_data()
+        labels = np.array(['a', 'b', 'c'])[np.argmax(X, axis=1)]
+        model = make_model(n_outputs=3, multiclass='ovr', metric_to_minimize=metrics.mean_squared_error).fit(X, labels)
+        preds = model.predict(X)
+        outputs = model.decision_function(X)
+        one_hot = (labels[:, None] == model.classes_).astype(float)
+
+        self.assertListEqual(list(model.classes_), ['a', 'b', 'c'])
+        self.assertEqual(outputs.shape, (X.shape[0], 3))
+        self.assertListEqual(list(preds), list(model.classes_[np.argmax(outputs, axis=1)]))
+        self.assertAlmostEqual(model.history_[-1]['best_score'],
+                               np.mean([np.mean((outputs[:, i]-one_hot[:, i])**2) for i in range(3)]))
+
+    def test_mutation_schedules(self):
+        X, y = make_data()
+        for mutation_schedule in ['one_fifth', 'self_adaptive']:
+            model = make_model(mutation_schedule=mutation_schedule).fit(X, y)
+            trajectory = [record['mutation_points'] for record in model.history_]
+
+            self.assertGreater(len(set(trajectory)), 1)
+            self.assertTrue(all(0.0 <= record['success_rate'] <= 1.0 for record in model.history_))
+
+    def test_active_mutation_modes(self):
+        X, y = make_data()
+        for mutation_mode in ['single_active', 'probabilistic_active']:
+            model = make_model(mutation_mode=mutation_mode)
+            model.cgf.init_random_genome()
+            parent = model.cgf.get_genome()
+            parent_key = model.cgf.get_phenotype_key(parent)
+            active_genes = set(model.cgf.get_active_genes(parent))
+            for child in model._get_mutated_samples(parent, n_points=1, new_samples_count=20):
+                self.assertNotEqual(model.cgf.get_phenotype_key(child), parent_key)
+                if mutation_mode == 'single_active':
+                    # only the first of n_points genes is drawn from the whole genome, the rest are active ones
+                    changed_inactive = [i for i, (a, b) in enumerate(zip(parent, child))
+                                        if a != b and i not in active_genes]
+                    self.assertLessEqual(len(changed_inactive), 1)
+
+            model.fit(X, y)
+            self.assertTrue(np.isfinite(model.history_[-1]['best_score']))
+
+    def test_same_phenotype_is_scored_once(self):
+        X, y = make_data()
+        model = make_model()
+        scored = list()
+        score_genomes = model._score_genomes
+
+        def recording_score_genomes(genomes, X, y):
+            scored.extend(model.cgf.get_phenotype_key(genome) for genome in genomes)
+            return score_genomes(genomes, X, y)
+
+        model._score_genomes = recording_score_genomes
+        model.fit(X, y)
+
+        self.assertEqual(len(scored), len(set(scored)))
+
+    @unittest.skipIf(sparse is None, 'scipy is not installed')
+    def test_sparse_input(self):
+        X, y = make_data()
+        X = np.hstack([X, np.zeros((X.shape[0], 50))])
+        X[::7, 3:] = 1.0
+        dense_model = make_model(n_inputs=X.shape[1]).fit(X, y)
+        sparse_model = make_model(n_inputs=X.shape[1]).fit(sparse.csr_matrix(X), y)
+
+        self.assertListEqual(list(sparse_model.cgf.get_genome()), list(dense_model.cgf.get_genome()))
+        np.testing.assert_allclose(sparse_model.predict(sparse.csr_matrix(X)), dense_model.predict(X))
+
+    def test_seeded_fit_is_reproducible(self):
+        X, y = make_data()
+        model = make_model()
+        genome = list(model.fit(X, y).cgf.get_genome())
+        best_scores = [record['best_score'] for record in model.history_]
+
+        random.seed(123)
+        other_model = make_model(seed=2).fit(X, y)
+        self.assertListEqual(list(model.fit(X, y).cgf.get_genome()), genome)
+        self.assertListEqual([record['best_score'] for record in model.history_], best_scores)
+        self.assertNotEqual(list(other_model.cgf.get_genome()), genome)
+
+    def test_set_params_rebuilds_genome_func(self):
+        X, y = make_data()
+        model = make_model(depth=6).set_params(depth=20, n_rows=3)
+
+        self.assertEqual(model.cgf._depth, 20)
+        self.assertEqual(model.cgf._n_rows, 3)
+        with self.assertRaises(NotImplementedError):
+            model.predict(X)
+
+        model.fit(X, y)
+        genome = model.cgf.get_genome()
+        model.set_params(n_generations=3)
+        self.assertFalse(model.not_fitted_yet)
+        self.assertEqual(model.cgf.get_genome(), genome)
+
+        model.set_params(basis_funcs=[neg, ])
+        self.assertTrue(model.not_fitted_yet)
+        self.assertEqual(model.arity, 1)
+        self.assertEqual(model.cgf._depth, 20)
+
+    def test_spawn(self):
+        X, y = make_data()
+        model = make_model()
+        children = model.spawn(3)
+
+        self.assertEqual(len({child.seed for child in children}), 3)
+        self.assertListEqual([child.seed for child in model.spawn(3)], [child.seed for child in children])
+        self.assertTrue(all(child.cgf is not model.cgf for child in children))
+        self.assertTrue(all(child.not_fitted_yet for child in model.fit(X, y).spawn(3)))
+        self.assertTrue(np.isfinite(make_model(warm_start=True).spawn(1)[0].fit(X, y).history_[-1]['best_score']))
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            genomes = list(executor.map(lambda child: list(child.fit(X, y).cgf.get_genome()), children))
+        self.assertListEqual(genomes, [list(child.fit(X, y).cgf.get_genome()) for child in model.spawn(3)])
+
+    def test_max_evaluations(self):
+        X, y = make_data()
+        model = make_model(n_generations=1000, max_evaluations=100).fit(X, y)
+
+        self.assertEqual(model.stop_reason_, 'max_evaluations')
+        self.assertLessEqual(model.n_evaluations_, 100)
+        self.assertLess(model.n_generations_, 1000)
+        self.assertEqual(model.history_[-1]['n_evaluations'], model.n_evaluations_)
+        self.assertEqual(model.predict(X).shape, (X.shape[0], 1))
+
+    def test_max_time_seconds(self):
+        X, y = make_data()
+        model = make_model(n_generations=100000, max_time_seconds=0.5).fit(X, y)
+
+        self.assertEqual(model.stop_reason_, 'max_time_seconds')
+        # budget is checked before each scoring batch, only bookkeeping after the last batch may overrun it
+        self.assertLess(model.history_[-1]['elapsed_seconds'], 0.55)
+
+        # generation much slower than initial population is stopped in the middle
+        n_calls = list()
+
+        def slowing_mae(y_true, y_pred):
+            n_calls.append(1)
+            time.sleep(0.001 if len(n_calls) <= 3 else 0.05)
+            return mae(y_true, y_pred)
+
+        slowed_model = make_model(metric_to_minimize=slowing_mae, n_generations=10, max_time_seconds=0.2).fit(X, y)
+        self.assertEqual(slowed_model.stop_reason_, 'max_time_seconds')
+        self.assertEqual(slowed_model.n_generations_, 1)
+        self.assertLess(slowed_model.history_[-1]['elapsed_seconds'], 0.4)
+        self.assertTrue(all(0.0 <= record['estimated_remaining_seconds'] <= 0.5 for record in model.history_))
+        self.assertEqual(make_model().fit(X, y).stop_reason_, 'n_generations')
+
+    def test_warm_start(self):
+        X, y = make_data()
+        model = make_model(warm_start=True).fit(X, y)
+        best_score = model.history_[-1]['best_score']
+
+        model.set_params(n_generations=1).fit(X, y)
+        self.assertLessEqual(model.history_[0]['best_score'], best_score)
+
+        # copies of unfitted model have only placeholder genome, they start from random genomes
+        unfitted_model = make_model(warm_start=True)
+        cloned_model = CartGenModel(**{name: copy.deepcopy(value)
+                                       for name, value in unfitted_model.get_params().items()})
+        self.assertTrue(np.isfinite(cloned_model.fit(X, y).history_[-1]['best_score']))
+        self.assertTrue(np.isfinite(unfitted_model.set_params(n_generations=3).fit(X, y).history_[-1]['best_score']))
+
+        shifted_model = make_model(n_generations=1, seed=5).fit(X + 0.01, y, init_genomes=model._top_genomes)
+        self.assertLessEqual(shifted_model._top_scores[0], model._score_genome(model._top_genomes[0], X + 0.01, y))
+
+    def test_init_genomes_validation(self):
+        X, y = make_data()
+
+        with self.assertRaises(ValueError):
+            make_model().fit(X, y, init_genomes=[[0.5, 0.5]])
+
+    def test_column_sources(self):
+        X, y = make_data()
+        model = make_model().fit(X, y)
+        used_inputs = model.get_used_inputs()
+        expected = model.predict(X)
+
+        self.assertListEqual(used_inputs, model.cgf.get_used_inputs())
+        np.testing.assert_allclose(model.predict({i: X[:, i] for i in used_inputs}), expected)
+        np.testing.assert_allclose(model.predict([X[:, i] for i in range(X.shape[1])]), expected)
+        # unused columns are never read
+        np.testing.assert_allclose(model.predict([X[:, i] if i in used_inputs else None for i in range(X.shape[1])]),
+                                   expected)
+        structured = np.rec.fromarrays([X[:, i] for i in range(X.shape[1])], names='a,b,c')
+        np.testing.assert_allclose(model.predict(structured), expected)
+
+    def test_cost_penalty(self):
+        X, y = make_data()
+        model = make_model().fit(X, y)
+        cheap_model = make_model(cost_objective='penalty', cost_weight=1e6).fit(X, y)
+
+        self.assertLessEqual(cheap_model.cgf.get_cost(), model.cgf.get_cost())
+        self.assertEqual(cheap_model.history_[-1]['best_cost'], cheap_model.cgf.get_cost())
+
+    def test_cost_pareto(self):
+        X, y = make_data()
+        model = make_model(cost_objective='pareto', elitarity_n=6, basis_costs='measure').fit(X, y)
+        front = model.pareto_front_
+        costs = [cost for _, cost, _ in front]
+
+        self.assertListEqual(costs, sorted(costs))
+        self.assertEqual(min(model.basis_costs_.values()), 1.0)
+        model.select_by_cost(costs[0])
+        self.assertLessEqual(model.cgf.get_cost(model.basis_costs_), costs[0])
+        with self.assertRaises(ValueError):
+            model.select_by_cost(costs[0] - 0.5)
+        with self.assertRaises(ValueError):
+            make_model().fit(X, y).select_by_cost(100.0)
+
+    def test_predict_to_file(self):
+        X, y = make_data()
+        model = make_model().fit(X, y)
+        expected = model.predict(X)
+
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'x.npy')
+            np.save(source, X)
+            preds = model.predict_to_file(source, os.path.join(directory, 'preds.npy'), block_size=64)
+            np.testing.assert_allclose(preds, expected)
+            del preds
+
+            blocks = list(model.predict_iter(X, block_size=64, prefetch_blocks=2))
+            self.assertListEqual([len(block) for block in blocks], [64, 64, 64, 8])
+            np.testing.assert_allclose(np.vstack(blocks), expected)
+
+    def test_profile(self):
+        X, y = make_data()
+        model = make_model(profile=True).fit(X, y)
+        report = model.profile_.report()
+
+        self.assertGreaterEqual(report['n_calls'], model.n_evaluations_)
+        self.assertGreater(sum(entry['calls'] for entry in report['basis']), 0)
+        self.assertIsNone(model.cgf.get_profiler())
+
+    def test_semantic_filter(self):
+        X, y = make_data()
+        model = make_model(semantic_probe_size=16).fit(X, y)
+
+        self.assertGreater(model.n_semantic_hits_, 0)
+        self.assertAlmostEqual(model._score_genome(model.cgf.get_genome(), X, y), model.history_[-1]['best_score'])
+
+        # probe samples are taken lazily, only from columns used by evaluated genomes
+        self.assertEqual(len(model._get_semantic_filter([None] * 3, y)[0].rows), 16)
+
+        small_table_model = make_model(semantic_probe_size=16, semantic_table_size=1).fit(X, y)
+        self.assertLessEqual(small_table_model.n_semantic_hits_, model.n_semantic_hits_)
+
+    def test_threads_backend(self):
+        X, y = make_data()
+        model = make_model(n_rows=4).fit(X, y)
+        expected = model.predict(X)
+
+        model.set_params(predict_backend='threads', n_jobs=2)
+        np.testing.assert_allclose(model.predict(X), expected)
+
+    def test_early_stopping(self):
+        X, y = make_data()
+        model = make_model(n_generations=500, n_iter_no_change=5).fit(X, y)
+
+        self.assertLess(model.n_generations_, 500)
+        self.assertEqual(model.stop_reason_, 'n_iter_no_change')
+        best_scores = [record['best_score'] for record in model.history_]
+        self.assertEqual(best_scores[-1], best_scores[-6])
+
+    def test_validation_fraction(self):
+        X, y = make_data()
+        model = make_model(validation_fraction=0.25, n_iter_no_change=3).fit(X, y)
+
+        self.assertTrue(all('validation_score' in record for record in model.history_))
+        best_validation = min(record['validation_score'] for record in model.history_)
+        self.assertTrue(np.isfinite(best_validation))
+
+    def test_validation_fraction_too_big(self):
+        X, y = make_data(n_samples=4)
+        model = make_model(validation_fraction=1.0)
+
+        with self.assertRaises(ValueError):
+            model.fit(X, y)
+
+
+class TestCartGenEnsemble(unittest.TestCase):
+    def test_members_on_feature_subsets(self):
+        X, y = make_data()
+        feature_indices = [[0, 1, 2], [2, 0, 1], [1, 2, 0]]
+        models = [make_model(basis_funcs=BASIS, n_generations=5, seed=seed).fit(X[:, indices], y)
+                  for seed, indices in enumerate(feature_indices)]
+
+        ensemble = CartGenEnsemble(models, feature_indices=feature_indices)
+        members_preds = ensemble.predict_members(X)
+
+        for model, indices, preds in zip(models, feature_indices, members_preds):
+            np.testing.assert_allclose(preds, model.predict(X[:, indices]))
+        np.testing.assert_allclose(ensemble.predict(X), np.mean(members_preds, axis=0))
+        self.assertLessEqual(ensemble.ensemble_cgf.n_ops, ensemble.ensemble_cgf.n_member_ops)
+
+    def test_identical_members_are_evaluated_once(self):
+        X, y = make_data()
+        model = make_model(n_generations=5).fit(X, y)
+
+        ensemble = CartGenEnsemble([model, model, model])
+
+        self.assertEqual(ensemble.ensemble_cgf.n_ops * 3, ensemble.ensemble_cgf.n_member_ops)
+
+    def test_outputs_are_exact_for_overflowing_inputs(self):
+        X = np.array([[np.inf], [-np.inf], [1e308], [1.0]])
+        models = list()
+        basis = {func.__name__: func for func in BASIS}
+        # neg(diff(x, x)) and summ(diff(x, x), x): rules of diff and summ are not exact for infinite x
+        for genome in [[0.1, 0.5, 0.5, 0.9, 0.1, 0.1, 0.1], [0.1, 0.5, 0.5, 0.5, 0.1, 0.9, 0.1]]:
+            model = make_model(n_inputs=1, depth=2, n_rows=1, recurse_depth=2,
+                               basis_funcs=[basis['diff'], basis['summ'], basis['neg']])
+            model.cgf.set_genome(genome)
+            model.not_fitted_yet = False
+            models.append(model)
+
+        with np.errstate(all='ignore'):
+            ensemble = CartGenEnsemble(models)
+            expected = np.mean([model.predict(X) for model in models], axis=0)
+            np.testing.assert_allclose(ensemble.predict(X), expected)
+        self.assertEqual(ensemble.ensemble_cgf.n_ops, 3)
+
+    def test_from_bagging(self):
+        class FittedBagging:
+            n_features_in_ = 3
+            estimators_features_ = [np.array([0, 2]), np.array([1, 2])]
+
+        X, y = make_data()
+        bagging = FittedBagging()
+        bagging.estimators_ = [make_model(n_inputs=2, n_generations=5, seed=seed).fit(X[:, features], y)
+                               for seed, features in enumerate(bagging.estimators_features_)]
+
+        ensemble = CartGenEnsemble.from_bagging(bagging)
+
+        np.testing.assert_allclose(ensemble.predict(X),
+                                   np.mean([model.predict(X[:, features]) for model, features in
+                                            zip(bagging.estimators_, bagging.estimators_features_)], axis=0))
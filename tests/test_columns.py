@@ -0,0 +1,95 @@
+"""
+This is tests for cartgen library.
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com 
+Full license in LICENSE file.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import tempfile
+import numpy as np
+from cartesian_genetics_base.columns import NpyColumns, RowsColumns, SparseColumns, get_columns, get_n_rows
+import unittest
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+
+@unittest.skipIf(sparse is None, 'scipy is not installed')
+class TestSparseColumns(unittest.TestCase):
+    def test_columns_are_densified_lazily(self):
+        X = np.array([[0.0, 1.0, 0.0],
+                      [2.0, 0.0, 0.0],
+                      [0.0, 3.0, 4.0]])
+        for matrix in [sparse.csr_matrix(X), sparse.coo_matrix(X), sparse.csc_matrix(X)]:
+            columns = get_columns(matrix)
+
+            self.assertIsInstance(columns, SparseColumns)
+            self.assertEqual(columns.n_densified, 0)
+            self.assertListEqual(list(columns[1]), [1.0, 0.0, 3.0])
+            self.assertIs(columns[1], columns[1])
+            self.assertEqual(columns.n_densified, 1)
+            self.assertEqual(get_n_rows(columns), 3)
+            self.assertEqual(columns.n_densified, 1)
+            self.assertListEqual([list(column) for column in columns], [list(column) for column in X.T])
+
+    def test_duplicate_entries_are_summed(self):
+        matrix = sparse.coo_matrix(([1.0, 2.0], ([0, 0], [1, 1])), shape=(2, 2))
+
+        self.assertListEqual(list(get_columns(matrix)[1]), [3.0, 0.0])
+
+
+class TestGetColumns(unittest.TestCase):
+    def test_dense_and_column_sequences(self):
+        X = np.arange(6.0).reshape(3, 2)
+        columns = get_columns(X)
+
+        self.assertListEqual([list(column) for column in columns], [[0.0, 2.0, 4.0], [1.0, 3.0, 5.0]])
+        self.assertIs(get_columns(columns), columns)
+
+    def test_structured_and_mapping(self):
+        X = np.array([(1.0, 2), (3.0, 4)], dtype=[('a', float), ('b', int)])
+        columns = get_columns(X)
+
+        self.assertListEqual([list(column) for column in columns], [[1.0, 3.0], [2, 4]])
+        self.assertEqual(get_n_rows(X), 2)
+
+        mapping = {3: np.ones(5)}
+        self.assertIs(get_columns(mapping), mapping)
+        self.assertEqual(get_n_rows(mapping), 5)
+        self.assertEqual(get_n_rows(columns), 2)
+        self.assertEqual(get_n_rows([None, np.ones(3)], [1]), 3)
+
+    def test_npy_columns_are_opened_lazily(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'column_1.npy')
+            np.save(path, np.arange(4.0))
+            columns = NpyColumns([os.path.join(directory, 'missing.npy'), path])
+
+            self.assertEqual(len(columns), 2)
+            self.assertListEqual(list(columns[1]), [0.0, 1.0, 2.0, 3.0])
+            self.assertIsInstance(columns[1], np.memmap)
+            with self.assertRaises(IndexError):
+                columns[2]
+            self.assertEqual(get_n_rows(columns, [1]), 4)
+
+    def test_rows_columns(self):
+        columns = RowsColumns({0: np.arange(5.0), 2: [10, 11, 12, 13, 14]}, np.array([1, 3]))
+
+        self.assertListEqual(list(columns[0]), [1.0, 3.0])
+        self.assertListEqual(list(columns[2]), [11, 13])
+        self.assertIs(columns[0], columns[0])
+        self.assertEqual(get_n_rows(columns), 2)
@@ -0,0 +1,60 @@
+"""
+This is tests for cartgen library.
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com 
+Full license in LICENSE file.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import copy
+import pickle
+from cartesian_genetics_base.genome import Genome
+import unittest
+
+
+class TestGenome(unittest.TestCase):
+    def test_sequence(self):
+        genome = Genome([0.1, 0.2, 0.3])
+
+        self.assertEqual(len(genome), 3)
+        self.assertEqual(genome[1], 0.2)
+        self.assertEqual(genome[1:], (0.2, 0.3))
+        self.assertListEqual(genome.to_list(), [0.1, 0.2, 0.3])
+        self.assertEqual(genome, [0.1, 0.2, 0.3])
+        self.assertEqual(hash(genome), hash((0.1, 0.2, 0.3)))
+        self.assertEqual(hash(genome), hash(Genome(genome)))
+        self.assertNotEqual(genome, Genome([0.1, 0.2, 0.4]))
+
+    def test_immutable(self):
+        genome = Genome([0.1, 0.2, 0.3])
+
+        with self.assertRaises(TypeError):
+            genome[0] = 0.5
+        with self.assertRaises(AttributeError):
+            genome.some_attribute = 1
+
+    def test_mutate(self):
+        genome = Genome([0.1, 0.2, 0.3])
+        mutated = genome.mutate({0: 0.5, 2: 0.6})
+
+        self.assertEqual(mutated, [0.5, 0.2, 0.6])
+        self.assertEqual(genome, [0.1, 0.2, 0.3])
+
+    def test_copies_share_genes(self):
+        genome = Genome([0.1, 0.2, 0.3])
+
+        self.assertIs(genome.clone(), genome)
+        self.assertIs(copy.deepcopy(genome), genome)
+        self.assertIs(Genome(genome)._genes, genome._genes)
+        self.assertEqual(pickle.loads(pickle.dumps(genome)), genome)
@@ -0,0 +1,69 @@
+"""
+This is tests for cartgen library.
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com 
+Full license in LICENSE file.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import numpy as np
+from cartesian_genetics_base import metrics
+import unittest
+
+try:
+    import sklearn.metrics
+except ImportError:
+    sklearn = None
+
+
+class TestFastMetrics(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.y_true = rng.normal(size=50)
+        self.y_preds = rng.normal(size=(4, 50))
+        self.labels = rng.randint(0, 2, size=50)
+        self.proba = rng.uniform(size=(4, 50))
+
+    def test_batch_equals_single(self):
+        for metric in [metrics.mean_absolute_error, metrics.mean_squared_error, metrics.r2_score]:
+            batch_scores = metric.batch(self.y_true, self.y_preds)
+            for scores, y_pred in zip(batch_scores, self.y_preds):
+                self.assertAlmostEqual(scores, metric(self.y_true, y_pred))
+
+        batch_scores = metrics.log_loss.batch(self.labels, self.proba)
+        self.assertAlmostEqual(batch_scores[2], metrics.log_loss(self.labels, self.proba[2]))
+
+    @unittest.skipIf(sklearn is None, 'sklearn is not installed')
+    def test_same_as_sklearn(self):
+        for name in ['mean_absolute_error', 'mean_squared_error', 'r2_score']:
+            self.assertAlmostEqual(getattr(metrics, name)(self.y_true, self.y_preds[0]),
+                                   getattr(sklearn.metrics, name)(self.y_true, self.y_preds[0]))
+
+        self.assertAlmostEqual(metrics.log_loss(self.labels, self.proba[0]),
+                               sklearn.metrics.log_loss(self.labels, self.proba[0]))
+        self.assertAlmostEqual(metrics.accuracy_score(self.labels, self.labels[::-1]),
+                               sklearn.metrics.accuracy_score(self.labels, self.labels[::-1]))
+        self.assertEqual(metrics.r2_score(np.ones(5), np.ones(5)), sklearn.metrics.r2_score(np.ones(5), np.ones(5)))
+
+    @unittest.skipIf(sklearn is None, 'sklearn is not installed')
+    def test_get_fast_metric(self):
+        self.assertIs(metrics.get_fast_metric(sklearn.metrics.mean_absolute_error), metrics.mean_absolute_error)
+        self.assertIs(metrics.get_fast_metric(sklearn.metrics.log_loss), metrics.log_loss)
+        self.assertIs(metrics.get_fast_metric(metrics.r2_score), metrics.r2_score)
+        self.assertIsNone(metrics.get_fast_metric(sklearn.metrics.median_absolute_error))
+        self.assertIsNone(metrics.get_fast_metric(lambda y_true, y_pred: 0.0))
+
+    def test_log_loss_needs_binary_target(self):
+        with self.assertRaises(ValueError):
+            metrics.log_loss(np.array([0, 1, 2]), np.array([0.1, 0.5, 0.9]))
@@ -0,0 +1,69 @@
+"""
+This is tests for cartgen library.
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com 
+Full license in LICENSE file.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import random
+from cartesian_genetics_base.genome import Genome
+from cartesian_genetics_base.mutation import (FixedMutation, OneFifthRuleMutation, SelfAdaptiveMutation,
+                                              get_mutation_schedule)
+import unittest
+
+
+class TestMutationSchedules(unittest.TestCase):
+    def test_fixed(self):
+        schedule = get_mutation_schedule(None)
+        schedule.start(3)
+        schedule.update(10, 10, [])
+
+        self.assertIsInstance(schedule, FixedMutation)
+        self.assertEqual(schedule.sample(Genome([0.1]), random.Random(1)), 3)
+        self.assertEqual(schedule.current_points(), 3.0)
+
+    def test_one_fifth_rule(self):
+        schedule = OneFifthRuleMutation(factor=2.0, max_points=10)
+        schedule.start(2)
+
+        schedule.update(10, 5, [])
+        self.assertEqual(schedule.current_points(), 4.0)
+        schedule.update(10, 5, [])
+        schedule.update(10, 5, [])
+        self.assertEqual(schedule.current_points(), 10.0)
+        for _ in range(10):
+            schedule.update(10, 1, [])
+        self.assertEqual(schedule.current_points(), 1.0)
+
+    def test_self_adaptive_rates_follow_elites(self):
+        rng = random.Random(1)
+        schedule = SelfAdaptiveMutation(tau=0.5)
+        schedule.start(4)
+        parent = Genome([0.1])
+        children = [Genome([i / 10.0]) for i in range(2, 6)]
+        rates = list()
+        for child in children:
+            rates.append(schedule.sample(parent, rng))
+            schedule.offspring(parent, child, rates[-1])
+
+        schedule.update(len(children), 1, [children[2]])
+
+        self.assertEqual(schedule.current_points(), rates[2])
+        self.assertEqual(len(set(rates)), len(rates))
+        self.assertNotEqual(schedule.sample(children[2], rng), rates[2])
+
+    def test_unknown_schedule(self):
+        with self.assertRaises(ValueError):
+            get_mutation_schedule('unknown')
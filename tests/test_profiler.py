@@ -0,0 +1,67 @@
+"""
+This is tests for cartgen library.
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com 
+Full license in LICENSE file.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import tempfile
+from cartesian_genetics_base.profiler import EvaluationProfiler
+import unittest
+
+
+def summ(x, y):
+    return x+y
+
+
+def log(x):
+    return x
+
+
+class TestEvaluationProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = EvaluationProfiler()
+        self.profiler.record_call([((1, 0), summ, 0.001, 80), ((2, 0), log, 0.005, 80)], 0.007)
+        self.profiler.record_call([((1, 0), summ, 0.003, 80), ((1, 1), log, 0.002, 0)], 0.006)
+
+    def test_report(self):
+        report = self.profiler.report()
+
+        self.assertEqual(report['n_calls'], 2)
+        self.assertAlmostEqual(report['total_seconds'], 0.013)
+        self.assertListEqual([entry['function'] for entry in report['basis']], ['log', 'summ'])
+        self.assertListEqual([entry['calls'] for entry in report['basis']], [2, 2])
+        self.assertListEqual([entry['bytes'] for entry in report['basis']], [80, 160])
+        self.assertAlmostEqual(report['basis'][1]['seconds_per_call'], 0.002)
+        self.assertListEqual([entry['address'] for entry in report['nodes']], [(2, 0), (1, 0), (1, 1)])
+
+        self.profiler.reset()
+        self.assertEqual(self.profiler.report()['n_calls'], 0)
+        self.assertDictEqual(self.profiler.get_basis_costs(), dict())
+
+    def test_basis_costs(self):
+        costs = self.profiler.get_basis_costs()
+
+        self.assertAlmostEqual(costs[summ], 1.0)
+        self.assertAlmostEqual(costs[log], 1.75)
+
+    def test_dump_collapsed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'profile.folded')
+            self.profiler.dump_collapsed(path)
+            with open(path) as f:
+                lines = f.read().splitlines()
+
+        self.assertListEqual(lines, ['call;log;n1_1 2000', 'call;log;n2_0 5000', 'call;summ;n1_0 4000'])
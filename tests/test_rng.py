@@ -0,0 +1,38 @@
+"""
+This is tests for cartgen library.
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com 
+Full license in LICENSE file.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import random
+from cartesian_genetics_base.rng import get_rng, spawn_seeds
+import unittest
+
+
+class TestRng(unittest.TestCase):
+    def test_get_rng(self):
+        rng = random.Random(1)
+
+        self.assertIs(get_rng(rng), rng)
+        self.assertEqual(get_rng(5).random(), random.Random(5).random())
+        self.assertIsNot(get_rng(), get_rng())
+
+    def test_spawn_seeds(self):
+        seeds = spawn_seeds(7, 4)
+
+        self.assertEqual(len(set(seeds)), 4)
+        self.assertListEqual(spawn_seeds(7, 4), seeds)
+        self.assertNotEqual(spawn_seeds(8, 4), seeds)
+        self.assertTrue(all(isinstance(seed, int) for seed in seeds))
@@ -0,0 +1,146 @@
+"""
+This is tests for cartgen library.
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com 
+Full license in LICENSE file.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import random
+from cartesian_genetics_base.selection import (EliteArchive, NSGA2Selection, OnePlusLambdaSelection, ParetoArchive,
+                                               TournamentSelection, crowding_distances, get_selection,
+                                               non_dominated_sort)
+import unittest
+
+
+class TestEliteArchive(unittest.TestCase):
+    def test_keeps_best(self):
+        archive = EliteArchive(3)
+        for score in [5, 1, 4, 2, 3, 0.5]:
+            archive.push([score / 10.0], score)
+
+        self.assertListEqual([score for score, _ in archive.items()], [0.5, 1, 2])
+        self.assertEqual(archive.worst_score(), 2)
+        self.assertEqual(archive.best(), (0.5, [0.05]))
+
+    def test_evicts_worst_not_better(self):
+        archive = EliteArchive(2)
+        archive.push([0.1], 1.0)
+        archive.push([0.2], 3.0)
+        archive.push([0.3], 2.0)
+
+        self.assertListEqual(archive.items(), [(1.0, [0.1]), (2.0, [0.3])])
+
+    def test_deduplication(self):
+        archive = EliteArchive(3)
+        self.assertTrue(archive.push([0.1, 0.2], 1.0))
+        self.assertFalse(archive.push((0.1, 0.2), 0.5))
+
+        self.assertEqual(len(archive), 1)
+        self.assertIn([0.1, 0.2], archive)
+
+    def test_ties(self):
+        archive = EliteArchive(1)
+        archive.push([0.1], 1.0)
+        self.assertFalse(archive.push([0.2], 1.0))
+
+        drifting_archive = EliteArchive(1, replace_ties=True)
+        drifting_archive.push([0.1], 1.0)
+        self.assertTrue(drifting_archive.push([0.2], 1.0))
+        self.assertEqual(drifting_archive.best(), (1.0, [0.2]))
+
+    def test_nan_score_is_worst(self):
+        archive = EliteArchive(2)
+        archive.push([0.1], float('nan'))
+        archive.push([0.2], 1.0)
+        archive.push([0.3], 2.0)
+
+        self.assertListEqual([genome for _, genome in archive.items()], [[0.2], [0.3]])
+
+
+class TestParetoArchive(unittest.TestCase):
+    def test_non_dominated_sort_and_crowding(self):
+        points = [(1.0, 5.0), (2.0, 2.0), (3.0, 3.0), (5.0, 1.0), (4.0, 4.0)]
+
+        self.assertListEqual(non_dominated_sort(points), [[0, 1, 3], [2], [4]])
+        self.assertListEqual(crowding_distances([(1.0, 5.0), (2.0, 2.0), (5.0, 1.0)]),
+                             [float('inf'), 2.0, float('inf')])
+
+    def test_keeps_front(self):
+        archive = ParetoArchive(3)
+        for i, (score, cost) in enumerate([(1.0, 5.0), (3.0, 3.0), (2.0, 2.0), (5.0, 1.0), (4.0, 4.0)]):
+            archive.push([i / 10.0], score, cost)
+
+        self.assertEqual(len(archive), 3)
+        self.assertListEqual(archive.front(), [(5.0, 1.0, [0.3]), (2.0, 2.0, [0.2]), (1.0, 5.0, [0.0])])
+        self.assertEqual(archive.best(), (1.0, [0.0]))
+        self.assertFalse(archive.push([0.5], 6.0, 6.0))
+
+    def test_many_pushes_keep_true_front(self):
+        rng = random.Random(0)
+        points = [(rng.random(), float(rng.randint(1, 5))) for _ in range(300)]
+        archive = ParetoArchive(10)
+        for i, (score, cost) in enumerate(points):
+            archive.push([i / 1000.0], score, cost)
+
+        true_front = sorted((points[i][0], points[i][1], [i / 1000.0]) for i in non_dominated_sort(points)[0])
+        self.assertEqual(len(archive), 10)
+        self.assertListEqual(sorted(archive.front()), true_front)
+
+    def test_equal_objectives_replace(self):
+        archive = ParetoArchive(3)
+        archive.push([0.1], 1.0, 1.0)
+        self.assertTrue(archive.push([0.2], 1.0, 1.0))
+
+        self.assertListEqual(archive.items(), [(1.0, [0.2])])
+        self.assertNotIn([0.1], archive)
+
+    def test_nsga2_prefers_first_front(self):
+        strategy = NSGA2Selection()
+        archive = strategy.make_archive(4)
+        for i, (score, cost) in enumerate([(1.0, 2.0), (2.0, 1.0), (3.0, 3.0), (4.0, 4.0)]):
+            archive.push([i / 10.0], score, cost)
+
+        parents = [parent for seed in range(20) for parent in strategy.select_parents(archive, random.Random(seed))]
+
+        self.assertEqual(len(parents), 80)
+        self.assertGreater(parents.count([0.0]), parents.count([0.2]))
+        self.assertGreater(parents.count([0.2]), parents.count([0.3]))
+
+
+class TestSelectionStrategies(unittest.TestCase):
+    def test_tournament_prefers_better(self):
+        archive = EliteArchive(4)
+        for i in range(4):
+            archive.push([i / 10.0], float(i))
+
+        parents = TournamentSelection(tournament_size=4).select_parents(archive, random.Random(1))
+
+        self.assertEqual(len(parents), 4)
+        self.assertGreater(parents.count([0.0]), 1)
+
+    def test_one_plus_lambda(self):
+        strategy = OnePlusLambdaSelection()
+        archive = strategy.make_archive(10)
+        archive.push([0.1], 1.0)
+        archive.push([0.2], 1.0)
+
+        self.assertListEqual(strategy.select_parents(archive, random.Random(1)), [[0.2]])
+
+    def test_get_selection(self):
+        self.assertIsInstance(get_selection('tournament'), TournamentSelection)
+        strategy = OnePlusLambdaSelection()
+        self.assertIs(get_selection(strategy), strategy)
+        with self.assertRaises(ValueError):
+            get_selection('unknown')
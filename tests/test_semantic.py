@@ -0,0 +1,47 @@
+"""
+This is tests for cartgen library.
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com 
+Full license in LICENSE file.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+from cartesian_genetics_base.semantic import FingerprintTable, get_fingerprint
+import unittest
+
+
+class TestGetFingerprint(unittest.TestCase):
+    def test_rounding_and_broadcast(self):
+        a, b, c = np.array([0.1, -1.0, 2.0]), np.array([0.2, 1.0, 0.0]), np.array([0.3, 0.0, -2.0])
+
+        self.assertEqual(get_fingerprint([(a+b)+c], 3), get_fingerprint([a+(b+c)], 3))
+        self.assertEqual(get_fingerprint([-0.0, np.array([np.nan, 1.0])], 2),
+                         get_fingerprint([np.zeros(2), np.array([-np.nan, 1.0])], 2))
+        self.assertNotEqual(get_fingerprint([a], 3), get_fingerprint([b], 3))
+        self.assertNotEqual(get_fingerprint([a, b], 3), get_fingerprint([b, a], 3))
+        self.assertEqual(get_fingerprint([a], 3, decimals=0), get_fingerprint([a+0.01], 3, decimals=0))
+
+
+class TestFingerprintTable(unittest.TestCase):
+    def test_least_recently_used_is_dropped(self):
+        table = FingerprintTable(size=2)
+        table.put(b'a', 1.0)
+        table.put(b'b', 2.0)
+        self.assertEqual(table.get(b'a'), 1.0)
+        table.put(b'c', 3.0)
+
+        self.assertEqual(len(table), 2)
+        self.assertIsNone(table.get(b'b'))
+        self.assertEqual(table.get(b'a'), 1.0)
+        self.assertEqual(table.get(b'c'), 3.0)
@@ -0,0 +1,99 @@
+"""
+This is tests for cartgen library.
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com 
+Full license in LICENSE file.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import asyncio
+import numpy as np
+from cartesian_genetics_base.serving import AsyncBatchPredictor
+import unittest
+
+
+class RecordingModel:
+    def __init__(self):
+        self.batch_sizes = list()
+
+    def predict(self, X):
+        self.batch_sizes.append(X.shape[0])
+        if np.any(np.isnan(X)):
+            raise ValueError('nan in input')
+        return np.vstack([X.sum(axis=1), X[:, 0]]).T
+
+
+class TestAsyncBatchPredictor(unittest.TestCase):
+    def test_rows_are_batched(self):
+        model = RecordingModel()
+        X = np.random.RandomState(0).normal(size=(100, 3))
+
+        async def run():
+            async with AsyncBatchPredictor(model, max_batch_size=16, max_wait_ms=50) as predictor:
+                return await asyncio.gather(*[predictor.predict(row) for row in X])
+
+        results = asyncio.run(run())
+
+        np.testing.assert_allclose(np.vstack(results), model.predict(X))
+        self.assertLessEqual(max(model.batch_sizes[:-1]), 16)
+        self.assertLess(len(model.batch_sizes), 100)
+
+    def test_wait_window_flushes_small_batch(self):
+        model = RecordingModel()
+
+        async def run():
+            async with AsyncBatchPredictor(model, max_batch_size=1000, max_wait_ms=1) as predictor:
+                return await predictor.predict(np.ones(3))
+
+        result = asyncio.run(run())
+
+        np.testing.assert_allclose(result, [3, 1])
+        self.assertListEqual(model.batch_sizes, [1])
+
+    def test_errors_go_to_callers(self):
+        model = RecordingModel()
+
+        async def run():
+            async with AsyncBatchPredictor(model, max_wait_ms=1) as predictor:
+                with self.assertRaises(ValueError):
+                    await predictor.predict(np.array([np.nan, 1, 1]))
+                return await predictor.predict(np.ones(3))
+
+        np.testing.assert_allclose(asyncio.run(run()), [3, 1])
+
+    def test_bad_row_fails_only_its_request(self):
+        model = RecordingModel()
+        model.n_inputs = 3
+
+        async def run():
+            async with AsyncBatchPredictor(model, max_batch_size=16, max_wait_ms=50) as predictor:
+                with self.assertRaises(ValueError):
+                    await predictor.predict(np.ones(4))
+                return await asyncio.gather(predictor.predict(np.array([np.nan, 1, 1])), predictor.predict(np.ones(3)),
+                                            return_exceptions=True)
+
+        bad, good = asyncio.run(run())
+
+        self.assertIsInstance(bad, ValueError)
+        np.testing.assert_allclose(good, [3, 1])
+        self.assertEqual(model.batch_sizes[0], 2)
+
+    def test_stopped_predictor(self):
+        async def run():
+            predictor = AsyncBatchPredictor(RecordingModel())
+            await predictor.stop()
+            await predictor.predict(np.ones(3))
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(run())
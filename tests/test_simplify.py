@@ -0,0 +1,98 @@
+"""
+This is tests for cartgen library.
+
+Copyright (C) 2021 Evgenii Tsatsorin eugtsa@gmail.com 
+Full license in LICENSE file.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import numpy as np
+from cartesian_genetics_base.basis import BASIS, summ, diff, mult, neg, div_2, mult_3, abss, sqrt
+from cartesian_genetics_base.cartesian_genome_func import CartesianGenomeFunc
+from cartesian_genetics_base.simplify import EvaluationGraph, Scale, simplify_genome_func
+import unittest
+
+
+class TestEvaluationGraph(unittest.TestCase):
+    def test_rules(self):
+        graph = EvaluationGraph(2)
+        x, y = graph.input(0), graph.input(1)
+
+        self.assertEqual(graph.op(neg, [graph.op(neg, [x])]), x)
+        self.assertEqual(graph.op(summ, [x, y]), graph.op(summ, [y, x]))
+        self.assertEqual(graph.op(mult, [x, graph.const(1.0)]), x)
+        self.assertEqual(graph.op(abss, [graph.op(abss, [x])]), graph.op(abss, [x]))
+        self.assertEqual(graph.op(div_2, [graph.op(mult_3, [graph.op(div_2, [x])])]),
+                         graph.op(Scale(0.75), [x]))
+
+        zero = graph.op(diff, [x, x])
+        self.assertEqual(zero, graph.const(0.0))
+        self.assertEqual(graph.op(summ, [y, zero]), y)
+
+    def test_constant_folding_and_outputs(self):
+        graph = EvaluationGraph(1)
+        x = graph.input(0)
+        const = graph.op(sqrt, [graph.op(mult_3, [graph.const(3.0)])])
+        graph.outputs = [graph.op(summ, [x, const]), const]
+
+        outputs = graph.call([np.array([1.0, 2.0])])
+
+        self.assertEqual(graph.n_ops, 1)
+        np.testing.assert_allclose(outputs[0], [4.0, 5.0])
+        np.testing.assert_allclose(outputs[1], [3.0, 3.0])
+
+
+class TestSimplifyGenomeFunc(unittest.TestCase):
+    def test_random_genomes_are_equivalent(self):
+        X = np.random.RandomState(0).normal(size=(100, 3))
+        inputs = [X[:, i] for i in range(3)]
+        cgf = CartesianGenomeFunc(n_inputs=3, n_outputs=2, depth=30, n_rows=2, recurse_depth=10, basis_funcs=BASIS,
+                                  seed=3)
+
+        for _ in range(50):
+            cgf.init_random_genome()
+            graph = simplify_genome_func(cgf, inputs)
+
+            self.assertLessEqual(graph.n_ops, len(cgf._get_active_graph()[0]))
+
+    def test_shared_subexpressions(self):
+        cgf = CartesianGenomeFunc(n_inputs=2, n_outputs=1, depth=2, n_rows=2, recurse_depth=2, basis_funcs=[summ, diff])
+        # layer 1: summ(x0, x1), summ(x1, x0); layer 2: diff of them; output is that diff
+        cgf.set_genome([0.1, 0.1, 0.6, 0.1, 0.6, 0.1, 0.9, 0.1, 0.3, 0.1, 0.1, 0.1, 0.1])
+
+        graph = simplify_genome_func(cgf, [np.arange(3.0), np.ones(3)])
+
+        self.assertEqual(graph.n_ops, 0)
+        np.testing.assert_allclose(graph.call([np.arange(3.0), np.ones(3)])[0], [0.0, 0.0, 0.0])
+
+    def test_equivalence_check(self):
+        def add_one(x):
+            return x + 1
+        add_one.rules = {'involution': True}
+
+        cgf = CartesianGenomeFunc(n_inputs=1, n_outputs=1, depth=2, n_rows=1, recurse_depth=1,
+                                  basis_funcs=[add_one])
+        cgf.set_genome([0.1, 0.1, 0.1, 0.1, 0.1])
+
+        with self.assertRaises(ValueError):
+            simplify_genome_func(cgf, [np.arange(3.0)])
+
+    def test_overflowing_values_are_checked(self):
+        cgf = CartesianGenomeFunc(n_inputs=1, n_outputs=1, depth=1, n_rows=1, recurse_depth=1, basis_funcs=[diff])
+        # diff(x0, x0) is simplified to 0, which is nan for infinite x0
+        cgf.set_genome([0.1, 0.1, 0.1, 0.1])
+
+        self.assertEqual(simplify_genome_func(cgf, [np.arange(3.0)]).n_ops, 0)
+        with self.assertRaises(ValueError):
+            simplify_genome_func(cgf, [np.array([1.0, np.inf])])